@@ -74,6 +74,14 @@ extras = {
         "opencv-python>=4.9.0.80",
         "mss>=9.0.1",
     ],
+    "stt": [
+        "faster-whisper>=1.1.0",
+        "av>=11.0.0",
+        "soundfile>=0.12.1",
+    ],
+    "onnx": [
+        "optimum[onnxruntime]>=1.23.0",
+    ],
 }
 
 # Объединяем все extras для полной установки
@@ -217,6 +217,37 @@ class ElenaAgent:
         except Exception as e:
             print(f"❌ Ошибка при запуске Telegram: {e}")
 
+    @staticmethod
+    async def _read_input(prompt: str) -> str:
+        """
+        input() без блокировки event loop: фоновые задачи (плановая очистка, когнитивный цикл) идут дальше
+
+        Чтение в потоке-демоне, а не в asyncio.to_thread: незавершённый input() в пуле по умолчанию
+        не дал бы программе завершиться по Ctrl+C, пока не нажат Enter.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[str] = loop.create_future()
+
+        def deliver(setter: Any, value: Any) -> None:
+            if not future.done():
+                setter(value)
+
+        def read() -> None:
+            try:
+                line = input(prompt)
+            except Exception as e:
+                result: Any = (future.set_exception, e)
+            else:
+                result = (future.set_result, line)
+            try:
+                loop.call_soon_threadsafe(deliver, *result)
+            except RuntimeError:
+                # Цикл уже закрыт - программа завершается
+                pass
+
+        threading.Thread(target=read, name="terminal-input", daemon=True).start()
+        return await future
+
     def _open_browser(self) -> None:
         """Открывает веб-интерфейс в браузере"""
         import time
@@ -281,7 +312,7 @@ class ElenaAgent:
                 if audio:
                     print("\n🎤 [Микрофон активен] Говорите или нажмите Enter для текстового ввода")
 
-                user_input = input("\n👤 Вы: ").strip()
+                user_input = (await self._read_input("\n👤 Вы: ")).strip()
 
                 if user_input == "" and audio:
                     print("🎤 Слушаю... (говорите)")
@@ -334,6 +365,11 @@ class ElenaAgent:
             cog_loop.stop()
             print("   ✅ Когнитивный цикл остановлен")
 
+        # Дописываем в память накопленные удачные диалоги
+        improver: Any = self.components.get("self_improvement")
+        if improver and hasattr(improver, "flush"):
+            improver.flush()
+
         # Сохраняем память
         mem: Any = self.components.get("memory")
         if mem and hasattr(mem, "save_state"):
@@ -375,12 +411,20 @@ class ElenaAgent:
         if cog_loop and hasattr(cog_loop, "run"):
             cognitive_task = asyncio.create_task(cog_loop.run())
 
+        cleanup_task: Optional[asyncio.Task[Any]] = None
+        cleaner: Any = self.components.get("cleanup")
+        if cleaner:
+            hours = self.config.get("cleanup", {}).get("auto_cleanup_interval", 24)
+            cleanup_task = asyncio.create_task(cleaner.schedule_cleanup(hours))
+
         try:
             await self.terminal_loop()
         finally:
             self.running = False
             if cognitive_task and not cognitive_task.done():
                 cognitive_task.cancel()
+            if cleanup_task and not cleanup_task.done():
+                cleanup_task.cancel()
             self._stop_services()
 
 
@@ -406,9 +450,17 @@ async def main_async() -> None:
 
 
 def main() -> None:
-    """Синхронная обёртка"""
+    """Синхронная обёртка (uvloop, если установлен: ставится вместе с uvicorn[standard])"""
+    try:
+        import uvloop  # type: ignore[import-not-found]
+
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+
     try:
-        asyncio.run(main_async())
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main_async())
     except KeyboardInterrupt:
         pass
 
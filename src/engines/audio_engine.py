@@ -2,16 +2,21 @@
 # Путь: /mnt/ai_data/ai-agent/src/engines/audio_engine.py
 """Аудио движок Елены - запись с микрофона и распознавание речи"""
 
-import whisper  # type: ignore[import-untyped]
 import sounddevice as sd  # type: ignore[import-untyped]
 import numpy as np
 import asyncio
+import math
 import os
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, Optional
 from loguru import logger
 
+from src.engines.whisper_models import load_whisper_model, transcribe_text
+
+# Whisper ожидает float32 моно 16 кГц: массив другой частоты он молча примет и распознает как мусор
+WHISPER_SAMPLE_RATE = 16000
+
 
 class AudioEngine:
     """Движок для работы с аудио: запись с микрофона и распознавание речи"""
@@ -33,11 +38,22 @@ class AudioEngine:
 
         os.environ["WHISPER_CACHE_DIR"] = str(cache_dir)
 
-        # Загружаем модель Whisper
-        self.model: Any = whisper.load_model(config["audio"]["whisper_model"])
+        # Загружаем модель Whisper (общая с AudioProcessor и Telegram ботом)
+        self.model: Any = load_whisper_model(
+            config["audio"]["whisper_model"],
+            config["audio"].get("device"),
+            config["audio"].get("whisper_backend", "openai"),
+            config.get("performance", {}).get("cpu_threads", 0),
+            compile_encoder=config["audio"].get("torch_compile", False),
+            compute_type=config["audio"].get("compute_type"),
+        )
         self.sample_rate: int = config["audio"]["sample_rate"]
         self.duration: int = config.get("audio", {}).get("listen_duration", 10)
 
+        # Целочисленный коэффициент для полифазного ресемплинга, если микрофон пишет не в 16 кГц
+        ratio_gcd = math.gcd(WHISPER_SAMPLE_RATE, self.sample_rate)
+        self._resample_ratio = (WHISPER_SAMPLE_RATE // ratio_gcd, self.sample_rate // ratio_gcd)
+
         logger.info(f"🎵 AudioEngine инициализирован (модель: {config['audio']['whisper_model']})")
 
     # Исправлено MyPy: duration теперь Optional[int] (ошибка 42)
@@ -74,8 +90,9 @@ class AudioEngine:
                 # Проверяем, есть ли звук в последнем куске
                 current_pos = int((time.time() - start_time) * self.sample_rate)
                 if current_pos > 100:
-                    # Используем np.max для анализа амплитуды
-                    if np.max(np.abs(recording[current_pos - 100 : current_pos])) > silence_threshold:
+                    # Пик амплитуды через max/min без временного массива np.abs
+                    chunk = recording[current_pos - 100 : current_pos]
+                    if chunk.max() > silence_threshold or chunk.min() < -silence_threshold:
                         last_sound_time = time.time()
 
                 # Если тишина длится дольше silence_timeout - останавливаемся
@@ -90,11 +107,13 @@ class AudioEngine:
             if end_idx > len(recording):
                 end_idx = len(recording)
 
-            audio = recording[:end_idx].flatten().astype(np.float32)
+            # Запись уже float32 (N, 1): reshape даёт представление без копий вместо flatten().astype()
+            audio = recording[:end_idx].reshape(-1)
+            if self.sample_rate != WHISPER_SAMPLE_RATE:
+                audio = self._resample(audio)
 
-            # Распознаем речь
-            result = self.model.transcribe(audio, language="ru")
-            text = cast(str, result.get("text", "")).strip()
+            # Распознаем речь в отдельном потоке: transcribe идёт секундами и заблокировал бы event loop агента
+            text = await asyncio.to_thread(transcribe_text, self.model, audio, "ru")
 
             if text:
                 logger.info(f"📝 Распознано: {text}")
@@ -106,3 +125,10 @@ class AudioEngine:
         except Exception as e:
             logger.error(f"❌ Ошибка записи/распознавания: {e}")
             return ""
+
+    def _resample(self, audio: np.ndarray) -> np.ndarray:
+        """Приведение записи к 16 кГц полифазным фильтром (целые коэффициенты, без FFT)"""
+        from scipy.signal import resample_poly  # type: ignore[import-untyped]
+
+        up, down = self._resample_ratio
+        return resample_poly(audio, up, down).astype(np.float32, copy=False)
@@ -5,16 +5,42 @@
 Говорит голосом Елены через RHVoice с женским нежным голосом
 """
 
+import hashlib
+import io
 import os
+import shutil
 import subprocess
 import tempfile
 from pathlib import Path
 import threading
 import queue
 import time
-from typing import Any, Dict, List, Optional, Union, cast
+import wave
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 from loguru import logger
 
+# Воспроизведение из памяти через PortAudio - без запуска плеера на каждую фразу.
+# OSError: модуль есть, но нет libportaudio
+try:
+    import numpy as np
+    import sounddevice as sd  # type: ignore[import-untyped]
+except (ImportError, OSError):
+    np = None  # type: ignore[assignment]
+    sd = None
+
+# Сколько синтезированных фраз держим в памяти (WAV короткой фразы - десятки КБ)
+SPEECH_CACHE_SIZE = 64
+# Сколько файлов speech_*.wav хранит дисковый кэш; при превышении удаляются давно не звучавшие
+SPEECH_DISK_CACHE_SIZE = 500
+
+# Плееры читают WAV из stdin - без записи воспроизводимого файла на диск
+PLAYER_COMMANDS = {
+    "aplay": ["aplay", "-q", "-"],
+    "paplay": ["paplay"],
+    "play": ["play", "-q", "-t", "wav", "-"],
+}
+
 
 class VoiceEngine:
     """
@@ -44,8 +70,18 @@ class VoiceEngine:
 
         # Проверка доступности RHVoice
         self.rhvoice_command: str = "RHVoice-test"
+        self._voices: Optional[str] = None  # вывод RHVoice --voices
+
+        # Плеер ищется один раз, а не запуском which перед каждой фразой
+        self._player: Optional[List[str]] = next(
+            (cmd for name, cmd in PLAYER_COMMANDS.items() if shutil.which(name)), None
+        )
         self.rhvoice_available = self._check_rhvoice()
 
+        # Кэш синтезированной речи: (текст, голос, скорость) -> WAV
+        self._speech_cache: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
+        self._speech_cache_lock = threading.Lock()
+
         # Очередь для асинхронного воспроизведения (Исправлено для MyPy: тип очереди)
         self.speech_queue: queue.Queue[Optional[str]] = queue.Queue()
         self.is_speaking = False
@@ -67,8 +103,7 @@ class VoiceEngine:
             rhvoice_commands = ["RHVoice-test", "rhvoice-client", "RHVoice-client"]
 
             for cmd in rhvoice_commands:
-                result = subprocess.run(["which", cmd], capture_output=True, text=True)
-                if result.returncode == 0:
+                if shutil.which(cmd):
                     self.rhvoice_command = cmd
                     logger.info(f"✅ Найден RHVoice: {cmd}")
                     return True
@@ -88,26 +123,23 @@ class VoiceEngine:
 
     def _list_available_voices(self) -> None:
         """Получение списка доступных голосов"""
-        try:
-            result = subprocess.run([self.rhvoice_command, "--voices"], capture_output=True, text=True)
-            if result.returncode == 0:
-                voices = result.stdout
-                logger.info(f"📋 Доступные голоса:\n{voices}")
-
-                # Проверяем наличие голоса Елены
-                if "elena" in voices.lower() or "елена" in voices.lower():
-                    logger.success("🎯 Голос 'Елена' найден!")
-                else:
-                    logger.warning("⚠️ Голос 'Елена' не найден, будет использован голос по умолчанию")
-                    # Пытаемся найти женский голос
-                    if "anna" in voices.lower():
-                        self.voice_profile = "anna"
-                    elif "irina" in voices.lower():
-                        self.voice_profile = "irina"
-                    elif "natalia" in voices.lower():
-                        self.voice_profile = "natalia"
-        except Exception as e:
-            logger.error(f"❌ Ошибка получения списка голосов: {e}")
+        voices = self.get_available_voices()
+        if self._voices is None:
+            return
+
+        logger.info(f"📋 Доступные голоса:\n{voices}")
+
+        # Проверяем наличие голоса Елены
+        voices_lower = voices.lower()
+        if "elena" in voices_lower or "елена" in voices_lower:
+            logger.success("🎯 Голос 'Елена' найден!")
+        else:
+            logger.warning("⚠️ Голос 'Елена' не найден, будет использован голос по умолчанию")
+            # Пытаемся найти женский голос
+            for name in ("anna", "irina", "natalia"):
+                if name in voices_lower:
+                    self.voice_profile = name
+                    break
 
     def _start_speaker_thread(self) -> None:
         """Запуск потока для асинхронного воспроизведения"""
@@ -141,6 +173,47 @@ class VoiceEngine:
             logger.info(f"💬 (без голоса): {text}")
             return
 
+        try:
+            wav = self._get_speech(text)
+            if wav:
+                self._play(wav)
+            logger.debug(f"🔊 Сказано: {text[:50]}...")
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка синтеза речи: {e}")
+            logger.info(f"💬 Текст: {text}")
+
+    def _get_speech(self, text: str) -> bytes:
+        """WAV для фразы: из кэша (повторяющиеся "Слушаю", "Готово") или синтез через RHVoice"""
+        key = (text, self.voice_profile, self.speed)
+        with self._speech_cache_lock:
+            wav = self._speech_cache.get(key)
+            if wav is not None:
+                self._speech_cache.move_to_end(key)
+                return wav
+
+        # Дисковый кэш: имя файла - хэш содержимого, поэтому переживает перезапуск
+        cache_file = self._speech_cache_path(*key)
+        if cache_file.exists():
+            wav = cache_file.read_bytes()
+            # Отметка использования: вытесняются файлы, которые давно не звучали
+            os.utime(cache_file)
+        else:
+            wav = self._synthesize(text, cache_file)
+        if wav:
+            with self._speech_cache_lock:
+                self._speech_cache[key] = wav
+                if len(self._speech_cache) > SPEECH_CACHE_SIZE:
+                    self._speech_cache.popitem(last=False)
+        return wav
+
+    def _speech_cache_path(self, text: str, profile: str, speed: int) -> Path:
+        """Файл кэша речи: стабильный между запусками хэш (встроенный hash() для строк случаен в каждом процессе)"""
+        digest = hashlib.blake2b(f"{profile}\0{speed}\0{text}".encode("utf-8"), digest_size=8).hexdigest()
+        return self.temp_dir / f"speech_{digest}.wav"
+
+    def _synthesize(self, text: str, cache_file: Path) -> bytes:
+        """Синтез фразы в WAV (байты) через RHVoice с сохранением в cache_file"""
         output_file: str = ""
         # Создаём временный файл с уникальным именем
         with tempfile.NamedTemporaryFile(suffix=".wav", dir=self.temp_dir, delete=False) as tmp_file:
@@ -170,30 +243,58 @@ class VoiceEngine:
                 ]
                 subprocess.run(cmd, check=True, capture_output=True)
 
-            # Проверяем, создан ли файл
-            if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                # Воспроизводим через aplay или paplay (твой оригинальный цикл)
-                for player in ["aplay", "paplay", "play"]:
-                    if subprocess.run(["which", player], capture_output=True).returncode == 0:
-                        subprocess.run([player, "-q", output_file])
-                        break
-                else:
-                    logger.warning("⚠️ Не найден аудиоплеер")
+            wav = Path(output_file).read_bytes()
+            if wav:
+                # Атомарно: недописанный файл не попадёт в кэш
+                os.replace(output_file, cache_file)
+                self._trim_disk_cache()
+            return wav
 
-            logger.debug(f"🔊 Сказано: {text[:50]}...")
+        finally:
+            # Очистка временного файла (после os.replace его уже нет)
+            try:
+                os.unlink(output_file)
+            except OSError:
+                pass
 
-        except Exception as e:
-            logger.error(f"❌ Ошибка синтеза речи: {e}")
-            logger.info(f"💬 Текст: {text}")
+    def _trim_disk_cache(self) -> None:
+        """Удаление самых старых файлов кэша речи сверх SPEECH_DISK_CACHE_SIZE"""
+        with os.scandir(self.temp_dir) as entries:
+            files = [
+                (entry.stat().st_mtime, entry.path)
+                for entry in entries
+                if entry.name.startswith("speech_") and entry.name.endswith(".wav") and entry.is_file()
+            ]
+        if len(files) <= SPEECH_DISK_CACHE_SIZE:
+            return
 
-        finally:
-            # Очистка временного файла
+        files.sort()
+        for _, path in files[: len(files) - SPEECH_DISK_CACHE_SIZE]:
             try:
-                if output_file and os.path.exists(output_file):
-                    os.unlink(output_file)
-            except Exception:
+                os.unlink(path)
+            except OSError:
                 pass
 
+    def _play(self, wav: bytes) -> None:
+        """Воспроизведение WAV из памяти: через sounddevice, иначе через aplay, paplay или play"""
+        if sd is not None:
+            try:
+                # RHVoice пишет 16-битный PCM - отдаём сэмплы прямо в PortAudio
+                with wave.open(io.BytesIO(wav)) as wav_file:
+                    samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+                    samples = samples.reshape(-1, wav_file.getnchannels())
+                    sd.play(samples, wav_file.getframerate())
+                sd.wait()
+                return
+            except Exception as e:
+                logger.debug(f"sounddevice не воспроизвёл речь, пробуем плеер: {e}")
+
+        # Плеер читает WAV из stdin
+        if self._player:
+            subprocess.run(self._player, input=wav)
+        else:
+            logger.warning("⚠️ Не найден аудиоплеер")
+
     def speak(self, text: str) -> bool:
         """
         Асинхронное воспроизведение речи
@@ -252,6 +353,8 @@ class VoiceEngine:
 
         # Останавливаем текущее воспроизведение
         try:
+            if sd is not None:
+                sd.stop()
             subprocess.run(["pkill", "-f", "aplay"], capture_output=True)
             subprocess.run(["pkill", "-f", "paplay"], capture_output=True)
         except Exception:
@@ -292,14 +395,15 @@ class VoiceEngine:
         logger.info(f"⚙️ Параметры голоса: скорость={self.speed}, тон={self.pitch}, громкость={self.volume}")
 
     def get_available_voices(self) -> str:
-        """Получение списка доступных голосов"""
-        try:
-            result = subprocess.run([self.rhvoice_command, "--voices"], capture_output=True, text=True)
-            if result.returncode == 0:
-                return result.stdout
-        except Exception:
-            pass
-        return "Список голосов недоступен"
+        """Получение списка доступных голосов (RHVoice опрашивается один раз, голоса не меняются на лету)"""
+        if self._voices is None:
+            try:
+                result = subprocess.run([self.rhvoice_command, "--voices"], capture_output=True, text=True)
+                if result.returncode == 0:
+                    self._voices = result.stdout
+            except Exception as e:
+                logger.error(f"❌ Ошибка получения списка голосов: {e}")
+        return self._voices if self._voices is not None else "Список голосов недоступен"
 
     def cleanup(self) -> None:
         """Очистка ресурсов перед завершением"""
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# Путь: /mnt/ai_data/ai-agent/src/engines/whisper_models.py
+"""Общие модели Whisper: веса загружаются один раз на процесс для всех компонентов"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+# (бэкенд, имя модели, устройство, параметры загрузки бэкенда) -> загруженная модель
+_models: Dict[Tuple[Any, ...], Any] = {}
+# id(модели faster-whisper) -> BatchedInferencePipeline над ней
+_pipelines: Dict[int, Any] = {}
+# id(модели openai-whisper) -> блокировка распознавания
+_transcribe_locks: Dict[int, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def load_whisper_model(
+    name: str,
+    device: Optional[str] = None,
+    backend: str = "openai",
+    cpu_threads: int = 0,
+    compile_encoder: bool = False,
+    compute_type: Optional[str] = None,
+) -> Any:
+    """
+    Модель Whisper из общего кэша; при первом запросе - загрузка
+
+    AudioEngine, AudioProcessor и Telegram бот с одинаковыми настройками получают один и тот же объект,
+    вместо того чтобы каждый держал свою копию весов в памяти.
+
+    Args:
+        name: имя модели (tiny, base, small, ...)
+        device: cpu / cuda; None - выбор по умолчанию
+        backend: "openai" (openai-whisper, PyTorch) или "faster" (faster-whisper, CTranslate2)
+        cpu_threads: потоков CPU для faster-whisper (0 - половина ядер)
+        compile_encoder: torch.compile энкодера openai-whisper на GPU (audio.torch_compile)
+        compute_type: тип вычислений faster-whisper (audio.compute_type); None - int8 на CPU, int8_float16 на GPU
+
+    Returns:
+        загруженная модель
+    """
+    # Умолчание подставляется до ключа: иначе 0 и явная половина ядер дали бы две копии одних весов.
+    # Половина ядер - Whisper не должен отбирать CPU у LLM и декодирования
+    cpu_threads = cpu_threads or max(1, (os.cpu_count() or 2) // 2)
+
+    # В ключе только то, что влияет на модель данного бэкенда: иначе настройки первого
+    # загрузившего молча достались бы всем, а лишние параметры плодили бы копии весов
+    if backend == "faster":
+        key: Tuple[Any, ...] = (backend, name, device, compute_type, cpu_threads)
+    else:
+        key = (backend, name, device, compile_encoder)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            if backend == "faster":
+                # CTranslate2: в 3-4 раза быстрее PyTorch
+                from faster_whisper import WhisperModel  # type: ignore[import-untyped]
+
+                # int8 на CPU: CTranslate2 сам выбирает ядра под процессор (VNNI/AVX2), веса в 4 раза меньше fp32
+                compute_type = compute_type or ("int8_float16" if device == "cuda" else "int8")
+                logger.info(f"📥 Загрузка faster-whisper ({name}, {device or 'auto'}, {compute_type})...")
+                model = WhisperModel(name, device=device or "auto", compute_type=compute_type, cpu_threads=cpu_threads)
+            else:
+                # Импорт здесь: whisper тянет torch
+                import whisper  # type: ignore[import-untyped]
+
+                logger.info(f"📥 Загрузка Whisper ({name}, {device or 'auto'})...")
+                model = whisper.load_model(name, device=device)
+                if compile_encoder and model.device.type == "cuda":
+                    _compile_encoder(model)
+
+            _models[key] = model
+
+    return model
+
+
+def _compile_encoder(model: Any) -> None:
+    """
+    torch.compile энкодера Whisper с CUDA graphs (mode="reduce-overhead")
+
+    Энкодер вызывается один раз на фразу и на GPU упирается в запуск ядер, а не в вычисления.
+    Компиляция идёт здесь же прогоном 30 секунд тишины - иначе первый запрос ждал бы её ~30 секунд.
+    """
+    import torch  # type: ignore[import-untyped]
+
+    if not hasattr(torch, "compile"):
+        logger.warning("⚠️ torch.compile недоступен (нужен PyTorch 2.x), энкодер Whisper без компиляции")
+        return
+
+    encoder = model.encoder
+    try:
+        torch.backends.cuda.matmul.allow_tf32 = True
+        model.encoder = torch.compile(encoder, mode="reduce-overhead")
+        # Форма и тип как при распознавании: мел-спектрограмма на 30 секунд, fp16
+        mel = torch.zeros(1, model.dims.n_mels, 3000, device=model.device, dtype=torch.float16)
+        with torch.inference_mode():
+            model.encoder(mel)
+        logger.info("⚡ Энкодер Whisper скомпилирован")
+    except Exception as e:
+        model.encoder = encoder
+        logger.warning(f"⚠️ Не удалось скомпилировать энкодер Whisper: {e}")
+
+
+def _batched_pipeline(model: Any) -> Any:
+    """BatchedInferencePipeline для модели faster-whisper (создаётся один раз на модель)"""
+    pipeline = _pipelines.get(id(model))
+    if pipeline is None:
+        from faster_whisper import BatchedInferencePipeline  # type: ignore[import-untyped]
+
+        pipeline = _pipelines.setdefault(id(model), BatchedInferencePipeline(model=model))
+    return pipeline
+
+
+def transcribe_text(
+    model: Any, audio: Any, language: str = "ru", batch_size: int = 0, condition_on_previous_text: bool = False
+) -> str:
+    """
+    Распознавание речи любой из моделей load_whisper_model
+
+    Args:
+        model: модель openai-whisper или faster-whisper
+        audio: float32 PCM 16 кГц моно или путь к файлу
+        language: язык речи
+        batch_size: для faster-whisper - сколько 30-секундных фрагментов длинной записи
+            прогонять за один проход модели (0 - последовательно, для коротких фраз)
+        condition_on_previous_text: подавать текст предыдущего окна как контекст - помогает на длинных
+            файлах, а на коротких фразах (микрофон, голосовые сообщения) только провоцирует зацикливание
+
+    Returns:
+        распознанный текст
+    """
+    if type(model).__module__.startswith("faster_whisper"):
+        if batch_size > 1:
+            # Длинные записи: фрагменты, найденные VAD, идут в модель пачками
+            segments, _ = _batched_pipeline(model).transcribe(
+                audio, language=language, beam_size=1, batch_size=batch_size
+            )
+            return "".join(segment.text for segment in segments).strip()
+
+        # Жадный поиск (по умолчанию у faster-whisper beam 5)
+        segments, _ = model.transcribe(
+            audio,
+            language=language,
+            beam_size=1,
+            condition_on_previous_text=condition_on_previous_text,
+            vad_filter=True,
+        )
+        # Сегменты - ленивый генератор: распознавание идёт по мере чтения
+        return "".join(segment.text for segment in segments).strip()
+
+    # fp16 только на GPU: на CPU whisper откатится в fp32, но с предупреждением на каждый вызов
+    fp16 = getattr(getattr(model, "device", None), "type", "cpu") == "cuda"
+    # openai-whisper на каждый вызов вешает на декодер хуки kv-кэша: два потока на одной модели
+    # портят кэш друг другу, поэтому вызовы на общей модели идут по очереди (CTranslate2 потокобезопасен)
+    with _transcribe_locks.setdefault(id(model), threading.Lock()):
+        result = model.transcribe(
+            audio, language=language, fp16=fp16, condition_on_previous_text=condition_on_previous_text
+        )
+    return str(result.get("text", "")).strip()
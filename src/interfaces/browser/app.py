@@ -8,7 +8,7 @@
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any, cast
 import asyncio
@@ -20,6 +20,14 @@ import uvicorn
 
 from loguru import logger
 
+# orjson (ставится вместе с chromadb) сериализует ответы API в разы быстрее стандартного json
+try:
+    import orjson  # noqa: F401
+
+    APIResponse: type[JSONResponse] = ORJSONResponse
+except ImportError:
+    APIResponse = JSONResponse
+
 
 # Модели данных для API
 class ChatMessage(BaseModel):
@@ -118,7 +126,7 @@ class BrowserApp:
         """
         self.config = config
         self.agent = agent
-        self.app = FastAPI(title="Елена - ИИ Ассистент")
+        self.app = FastAPI(title="Елена - ИИ Ассистент", default_response_class=APIResponse)
         self.manager = ConnectionManager()
 
         # Настройка шаблонов и статики
@@ -208,14 +216,14 @@ class BrowserApp:
             try:
                 agent_any = cast(Any, self.agent)
                 if not hasattr(agent_any, "tool_executor"):
-                    return JSONResponse(status_code=400, content={"error": "ToolExecutor не доступен"})
+                    return APIResponse(status_code=400, content={"error": "ToolExecutor не доступен"})
 
                 # Преобразуем команду в действие
                 action = {"type": command.command, **command.params}
 
                 result = await agent_any.tool_executor.execute(action)
 
-                return JSONResponse(content=result)
+                return APIResponse(content=result)
 
             except Exception as e:
                 logger.error(f"❌ Ошибка выполнения команды: {e}")
@@ -292,7 +300,7 @@ class BrowserApp:
             Получение истории сообщений
             """
             # Здесь можно добавить загрузку истории из памяти
-            return JSONResponse(content={"history": [], "total": 0})
+            return APIResponse(content={"history": [], "total": 0})
 
         @self.app.get("/api/metrics")
         async def get_metrics():
@@ -300,7 +308,7 @@ class BrowserApp:
             Получение метрик производительности
             """
             agent_any = cast(Any, self.agent)
-            return JSONResponse(
+            return APIResponse(
                 content={
                     "requests": self.request_count,
                     "active_connections": len(self.manager.active_connections),
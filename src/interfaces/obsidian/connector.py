@@ -16,6 +16,13 @@ from typing import Any, Dict, List, Optional, Union
 import frontmatter  # type: ignore
 from loguru import logger
 
+# Шаблоны разбора заметок компилируются один раз, а не на каждый файл хранилища
+_TAG_RE = re.compile(r"#(\w+)")
+_LINK_RE = re.compile(r"\[\[(.*?)\]\]")
+
+# Недопустимые в имени файла символы удаляются, пробелы заменяются на "_" - за один проход str.translate
+_TITLE_TRANSLATION = str.maketrans({**dict.fromkeys('<>:"/\\|?*'), " ": "_"})
+
 
 class ObsidianConnector:
     """
@@ -77,11 +84,11 @@ class ObsidianConnector:
                         metadata = {}
 
                 # Извлекаем теги из содержимого #tag
-                tags = re.findall(r"#(\w+)", content)
+                tags = _TAG_RE.findall(content)
                 metadata["tags"] = tags
 
                 # Извлекаем вики-ссылки [[ссылка]]
-                links = re.findall(r"\[\[(.*?)\]\]", content)
+                links = _LINK_RE.findall(content)
                 metadata["links"] = links
 
                 # Сохраняем в кэш
@@ -114,8 +121,7 @@ class ObsidianConnector:
         Создание новой заметки
         """
         # Очищаем заголовок от недопустимых символов
-        clean_title = re.sub(r'[<>:"/\\|?*]', "", title)
-        clean_title = clean_title.replace(" ", "_")
+        clean_title = title.translate(_TITLE_TRANSLATION)
 
         # Определяем путь
         if folder:
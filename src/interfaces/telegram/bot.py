@@ -3,24 +3,127 @@
 """Telegram бот для Елены - стабильная версия с голосовой поддержкой"""
 
 import asyncio
+import io
 import threading
 import time
-import subprocess
-from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, Set, Optional, cast, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple, cast, Union
 
-from telegram import Update, Message, User, Chat, Voice
+import numpy as np
+from telegram import Update, Message, MessageEntity, User, Chat, Voice
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from loguru import logger
 import os
 
-# Игнорируем отсутствие типов для прохождения CI MyPy
-import whisper  # type: ignore[import-untyped]
-import sounddevice  # type: ignore[import-untyped]
+from src.engines.whisper_models import load_whisper_model, transcribe_text
+
+# PyAV декодирует OGG/Opus прямо в процессе, без форка ffmpeg; без него - ffmpeg через пайпы
+try:
+    import av  # type: ignore[import-untyped]
+except ImportError:
+    av = None
+
+# Более быстрый event loop для потока бота; без него - стандартный asyncio
+try:
+    import uvloop  # type: ignore[import-not-found]
+except ImportError:
+    uvloop = None
 
 if TYPE_CHECKING:
     from src.core.bootstrap import ElenaAgent
 
+# Типы обновлений, которые реально обрабатывает бот: остальные Telegram не присылает вовсе
+ALLOWED_UPDATES = [Update.MESSAGE]
+
+# Long-polling: сервер держит getUpdates до POLL_TIMEOUT сек (50 - практический максимум Telegram),
+# HTTP-таймаут чтения должен быть больше
+POLL_TIMEOUT = 50
+POLL_READ_TIMEOUT = POLL_TIMEOUT + 5
+
+# Не чаще одного "печатает..." на чат за это время (индикатор сам держится ~5 сек)
+TYPING_INTERVAL = 4.0
+# "печатает..." отправляется, только если ответ не готов за это время (кэш и быстрые ответы - без лишнего запроса)
+TYPING_DELAY = 0.3
+
+# Размер пула HTTP-соединений для запросов к Bot API (кроме getUpdates)
+CONNECTION_POOL_SIZE = 16
+
+# Сколько обновлений обрабатывается одновременно (telegram.concurrent_updates в конфиге).
+# Тяжёлая работа всё равно ограничена пулами потоков, лимит лишь не даёт копиться тысячам задач
+CONCURRENT_UPDATES = 32
+
+# Сколько последних сообщений помним для защиты от повторной обработки
+DEDUP_SIZE = 1024
+
+# Минимальный интервал между сообщениями из одного чата (секунды)
+RATE_LIMIT_INTERVAL = 0.5
+
+# Сколько распознанных голосовых (по file_unique_id) держим в памяти
+MEDIA_CACHE_SIZE = 1024
+
+# Кэш ответов LLM на короткие повторяющиеся фразы
+REPLY_CACHE_SIZE = 256
+REPLY_CACHE_TTL = 600  # секунд
+REPLY_CACHE_MAX_TEXT = 200  # длиннее - не кэшируем
+
+# Сколько секунд считаем статус компонентов актуальным
+STATUS_CACHE_TTL = 2.0
+
+# Ограничения времени на вызовы компонентов агента (секунды)
+LLM_TIMEOUT = 60
+STT_TIMEOUT = 60
+SCREENSHOT_TIMEOUT = 30
+
+
+def _bold_entities(text: str) -> Tuple[str, Tuple[MessageEntity, ...]]:
+    """
+    Разметка **жирного** в готовые MessageEntity: постоянные тексты размечаются один раз при импорте,
+    и Telegram не разбирает Markdown на каждое сообщение. Смещения считаются в UTF-16, как требует Bot API.
+    """
+    parts = text.split("**")
+    plain: list[str] = []
+    entities: list[MessageEntity] = []
+    offset = 0
+
+    for i, part in enumerate(parts):
+        length = len(part.encode("utf-16-le")) // 2
+        if i % 2 and length:
+            entities.append(MessageEntity(type=MessageEntity.BOLD, offset=offset, length=length))
+        plain.append(part)
+        offset += length
+
+    return "".join(plain), tuple(entities)
+
+
+# Постоянные тексты ответов (жирный - через MessageEntity, без parse_mode)
+HELP_TEXT, HELP_ENTITIES = _bold_entities(
+    "📚 **Доступные команды:**\n\n"
+    "/start - Начать работу\n"
+    "/help - Показать эту справку\n"
+    "/status - Статус системы\n\n"
+    "📊 Статус - информация о системе\n"
+    "📝 Задачи - текущие задачи\n"
+    "📸 Скриншот - сделать скриншот\n"
+    "📦 Бэкап - информация о бэкапе\n\n"
+    "🎤 Голосовые сообщения - отправьте голосовое, я распознаю и отвечу\n\n"
+    "Просто напиши мне сообщение - я отвечу!"
+)
+TASKS_TEXT, TASKS_ENTITIES = _bold_entities(
+    "📝 **Текущие задачи:**\n• Мониторинг системы\n• Обработка запросов\n• Обучение на диалогах"
+)
+BACKUP_TEXT, BACKUP_ENTITIES = _bold_entities(
+    "📦 **Бэкап системы:**\n• Память сохранена\n• Конфигурация в порядке\n• Все системы работают"
+)
+# Жирный только в заголовке, до подстановок, поэтому смещения сущностей от format_map не меняются
+STATUS_TEMPLATE, STATUS_ENTITIES = _bold_entities(
+    "📊 **Статус системы:**\n\n🤖 Агент: Елена v0.1.0\n"
+    "🧠 Память: {memory}\n"
+    "🔊 Голос: {voice}\n"
+    "👁️ Зрение: {vision}"
+)
+TIMEOUT_TEXT = "⏳ Я всё ещё думаю над этим... Попробуй ещё раз чуть позже или проверь /status"
+
 
 class TelegramBot:
     """
@@ -37,16 +140,113 @@ class TelegramBot:
         self.application: Optional[Application] = None
         self._thread: Optional[threading.Thread] = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Создаётся в _run_bot внутри цикла бота, выставляется из stop()
+        self._stop_event: Optional[asyncio.Event] = None
         self._running: bool = False
+        # Тот же словарь, что у агента (заполняется на месте), - без getattr/hasattr на каждое сообщение
+        self._components: Dict[str, Any] = getattr(agent, "components", {})
 
         # Исправлено: добавлены аннотации типов (ошибки 39, 40)
-        self._processed_messages: Set[str] = set()
-        self._last_message_time: Dict[int, float] = {}
+        # Обработанные сообщения - LRU: при переполнении забываем только самые старые.
+        # Ключ (chat_id, message_id): message_id уникален в пределах чата, текст в ключе не нужен
+        self._processed_messages: "OrderedDict[Tuple[int, int], None]" = OrderedDict()
+        # Время последнего сообщения по чатам (time.monotonic), упорядочено от старых к новым
+        self._last_message_time: "OrderedDict[int, float]" = OrderedDict()
+
+        # Когда в чат последний раз отправляли "печатает..." (time.monotonic)
+        self._last_typing_time: "OrderedDict[int, float]" = OrderedDict()
+
+        # LRU-кэш распознанных голосовых: file_unique_id -> текст
+        self._voice_cache: "OrderedDict[str, str]" = OrderedDict()
+
+        # Кэш ответов: нормализованный текст -> (ответ, момент устаревания по time.monotonic())
+        self._reply_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+        # Кэш статуса компонентов (состав компонентов меняется редко)
+        self._status_cache: Optional[Dict[str, Any]] = None
+        self._status_cache_ts: float = 0.0
+
+        # Модель Whisper для голосовых: одна на всё время работы бота
+        self._whisper_model: Any = None
+        self._whisper_lock = threading.Lock()
+
+        # Специальные текстовые команды (кнопки): текст -> обработчик
+        self._special_handlers: Dict[str, Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[None]]] = {
+            "📊 Статус": self.cmd_status,
+            "📝 Задачи": self._reply_tasks,
+            "📸 Скриншот": self._handle_screenshot,
+            "📦 Бэкап": self._reply_backup,
+        }
+
+        # Пул для блокирующих вызовов (LLM, декодирование, скриншоты), чтобы event loop бота оставался свободным
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="telegram")
+        # Whisper - отдельный однопоточный пул: распознавание не конкурирует само с собой за CPU
+        # и не занимает потоки, нужные для ответов LLM
+        self._whisper_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
 
         logger.info("📱 Telegram бот инициализирован")
 
+    def _seen(self, key: Tuple[int, int]) -> bool:
+        """
+        Проверка повтора: True, если сообщение уже обрабатывалось, иначе запоминает его
+
+        Проверка и запись идут без await, поэтому атомарны для event loop даже при concurrent_updates -
+        блокировки и шардирование не нужны (то же для _rate_limited и кэшей бота).
+        """
+        if key in self._processed_messages:
+            self._processed_messages.move_to_end(key)
+            return True
+
+        self._processed_messages[key] = None
+        if len(self._processed_messages) > DEDUP_SIZE:
+            self._processed_messages.popitem(last=False)
+        return False
+
+    def _rate_limited(self, chat_id: int) -> bool:
+        """True, если из чата пишут чаще, чем раз в RATE_LIMIT_INTERVAL секунд"""
+        now = time.monotonic()
+        last_time = self._last_message_time.get(chat_id)
+        if last_time is not None and now - last_time < RATE_LIMIT_INTERVAL:
+            return True
+
+        self._last_message_time[chat_id] = now
+        self._last_message_time.move_to_end(chat_id)
+
+        # Записи старше интервала уже ни на что не влияют - удаляем их с начала (самые старые)
+        while True:
+            oldest_chat, oldest_time = next(iter(self._last_message_time.items()))
+            if now - oldest_time < RATE_LIMIT_INTERVAL:
+                break
+            del self._last_message_time[oldest_chat]
+
+        return False
+
+    async def _send_typing(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
+        """
+        Показывает "печатает..." с таймаутом.
+        Индикатор в Telegram держится ~5 сек, поэтому чаще раза в TYPING_INTERVAL секунд не отправляем.
+        """
+        now = time.monotonic()
+        last_time = self._last_typing_time.get(chat_id)
+        if last_time is not None and now - last_time < TYPING_INTERVAL:
+            return
+
+        self._last_typing_time[chat_id] = now
+        self._last_typing_time.move_to_end(chat_id)
+        while now - next(iter(self._last_typing_time.values())) >= TYPING_INTERVAL:
+            self._last_typing_time.popitem(last=False)
+
+        try:
+            await asyncio.wait_for(context.bot.send_chat_action(chat_id=chat_id, action="typing"), timeout=3.0)
+        except Exception as e:
+            logger.debug(f"⚠️ Не удалось отправить typing (не критично): {e}")
+
     def _get_component_status(self) -> Dict[str, Any]:
-        """Получает статус всех компонентов из агента"""
+        """Получает статус всех компонентов из агента (кэшируется на STATUS_CACHE_TTL секунд)"""
+        now = time.monotonic()
+        if self._status_cache is not None and now - self._status_cache_ts < STATUS_CACHE_TTL:
+            return self._status_cache
+
         status: Dict[str, Any] = {
             "memory": False,
             "voice": False,
@@ -55,21 +255,46 @@ class TelegramBot:
             "memory_count": 0,
         }
 
-        agent_any = cast(Any, self.agent)
-        if hasattr(agent_any, "components"):
-            status["memory"] = "memory" in agent_any.components
-            status["voice"] = "voice" in agent_any.components
-            status["vision"] = "vision" in agent_any.components
-            status["tool_executor"] = "tool_executor" in agent_any.components
+        components = self._components
+        status["voice"] = "voice" in components
+        status["vision"] = "vision" in components
+        status["tool_executor"] = "tool_executor" in components
 
-            if status["memory"] and hasattr(agent_any.components["memory"], "short_term"):
-                status["memory_count"] = len(agent_any.components["memory"].short_term)
+        memory = components.get("memory")
+        status["memory"] = memory is not None
+        short_term = getattr(memory, "short_term", None)
+        if short_term is not None:
+            status["memory_count"] = len(short_term)
 
+        self._status_cache = status
+        self._status_cache_ts = now
         return status
 
     def _build_application(self) -> None:
         """Создание Application (вызывается в главном потоке)"""
-        self.application = Application.builder().token(self.token).build()
+        config = cast(Any, self.agent).config if hasattr(self.agent, "config") else {}
+        telegram_cfg: Dict[str, Any] = config.get("telegram", {})
+        request_timeout = float(telegram_cfg.get("request_timeout", 30))
+        concurrent_updates = int(telegram_cfg.get("concurrent_updates", CONCURRENT_UPDATES))
+
+        # Обычные запросы (ответы, typing, скачивание файлов) идут через общий пул keep-alive соединений:
+        # по умолчанию в PTB пул из одного соединения, и параллельные ответы ждут друг друга.
+        # concurrent_updates: долгий ответ LLM или распознавание голоса не задерживают другие чаты
+        # (общее состояние бота меняется только синхронно, между await, поэтому гонок нет)
+        self.application = (
+            Application.builder()
+            .token(self.token)
+            .connection_pool_size(CONNECTION_POOL_SIZE)
+            .connect_timeout(10)
+            .read_timeout(request_timeout)
+            .write_timeout(request_timeout)
+            .pool_timeout(5)
+            .concurrent_updates(concurrent_updates)
+            .get_updates_read_timeout(POLL_READ_TIMEOUT)
+            .get_updates_write_timeout(30)
+            .get_updates_connect_timeout(30)
+            .build()
+        )
         self._register_handlers()
         logger.debug("📱 Application построен")
 
@@ -92,7 +317,7 @@ class TelegramBot:
         logger.debug("📱 Обработчики зарегистрированы")
 
     def start(self) -> None:
-        """Запуск бота в отдельном потоке"""
+        """Запуск бота в отдельном потоке (для синхронного кода; в async-приложении - start_async)"""
         if self._thread and self._thread.is_alive():
             logger.warning("📱 Telegram бот уже запущен")
             return
@@ -103,9 +328,51 @@ class TelegramBot:
         self._thread.start()
         logger.info("✅ Telegram бот запущен в фоновом потоке")
 
+        self._start_whisper_prewarm()
+
+    async def start_async(self) -> None:
+        """
+        Запуск бота в уже работающем event loop вызывающего (без отдельного потока)
+
+        Корутина работает до stop(); вызывать как задачу: asyncio.create_task(bot.start_async())
+        """
+        if self._running:
+            logger.warning("📱 Telegram бот уже запущен")
+            return
+
+        self._build_application()
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._start_whisper_prewarm()
+        logger.info("✅ Telegram бот запущен в текущем event loop")
+
+        try:
+            await self._run_bot()
+        finally:
+            self._running = False
+
+    def _start_whisper_prewarm(self) -> None:
+        """
+        Загрузка модели заранее, чтобы первое голосовое не ждало загрузку весов
+
+        Прогрев идёт через тот же пул, что и распознавание голосовых, - не параллельно с ним.
+        Без компонента audio голосовые не распознаются, и модель не нужна.
+        """
+        if "audio" in self._components:
+            self._whisper_pool.submit(self._prewarm_whisper)
+
+    def _prewarm_whisper(self) -> None:
+        """Фоновая загрузка Whisper и прогон на 0.5 сек тишины (прогрев ядер torch/CTranslate2)"""
+        try:
+            self._get_whisper()
+            self._transcribe_audio(np.zeros(8000, dtype=np.float32))
+            logger.debug("🎤 Whisper для Telegram прогрет")
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось заранее загрузить Whisper: {e}")
+
     def _thread_target(self) -> None:
-        """Целевая функция для потока - здесь создается event loop"""
-        self._loop = asyncio.new_event_loop()
+        """Целевая функция для потока - здесь создается event loop (uvloop, если установлен)"""
+        self._loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
         asyncio.set_event_loop(self._loop)
 
         try:
@@ -123,18 +390,16 @@ class TelegramBot:
             return
 
         logger.info("🚀 Запуск Telegram бота в потоке...")
+        self._stop_event = asyncio.Event()
 
         while self._running:
             try:
                 await self.application.initialize()
                 await self.application.start()
                 if self.application.updater:
-                    await self.application.updater.start_polling(
-                        drop_pending_updates=True, timeout=30, read_timeout=30, write_timeout=30, connect_timeout=30
-                    )
+                    await self._start_updater()
 
-                while self._running:
-                    await asyncio.sleep(1)
+                await self._stop_event.wait()
 
             except Exception as e:
                 err_str = str(e)
@@ -153,6 +418,46 @@ class TelegramBot:
                 except Exception:
                     pass
 
+    async def _start_updater(self) -> None:
+        """
+        Запуск получения обновлений: webhook, если он включён в конфиге, иначе long-polling
+
+        Webhook требует python-telegram-bot[webhooks] и публичный HTTPS адрес (telegram.webhook.url).
+        Секрет берётся из TELEGRAM_WEBHOOK_SECRET - PTB сам проверяет заголовок
+        X-Telegram-Bot-Api-Secret-Token и отклоняет чужие запросы.
+        """
+        if not self.application or not self.application.updater:
+            return
+
+        config = cast(Any, self.agent).config if hasattr(self.agent, "config") else {}
+        webhook_cfg: Dict[str, Any] = config.get("telegram", {}).get("webhook") or {}
+        webhook_url: str = webhook_cfg.get("url") or ""
+
+        if webhook_cfg.get("enabled") and webhook_url:
+            url_path: str = webhook_cfg.get("path", "telegram")
+            await self.application.updater.start_webhook(
+                listen=webhook_cfg.get("listen", "0.0.0.0"),
+                port=int(webhook_cfg.get("port", 8443)),
+                url_path=url_path,
+                webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+                secret_token=os.getenv("TELEGRAM_WEBHOOK_SECRET") or None,
+                allowed_updates=ALLOWED_UPDATES,
+                drop_pending_updates=True,
+            )
+            logger.info(f"🌐 Telegram webhook: {webhook_url}")
+            return
+
+        if webhook_cfg.get("enabled"):
+            logger.warning("⚠️ Webhook включён, но telegram.webhook.url не задан - используем long-polling")
+
+        await self.application.updater.start_polling(
+            poll_interval=0.0,
+            timeout=POLL_TIMEOUT,
+            bootstrap_retries=-1,
+            allowed_updates=ALLOWED_UPDATES,
+            drop_pending_updates=True,
+        )
+
     def stop(self) -> None:
         """Остановка бота (вызывается из главного потока)"""
         if not self._running:
@@ -161,9 +466,19 @@ class TelegramBot:
         logger.info("⏹️ Остановка Telegram бота...")
         self._running = False
 
+        # Будим _run_bot сразу, без ожидания очередного тика
+        if self._loop and self._stop_event:
+            try:
+                self._loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # цикл уже закрыт
+
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=5)
 
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._whisper_pool.shutdown(wait=False, cancel_futures=True)
+
         logger.success("✅ Telegram бот остановлен")
 
     # --- Обработчики команд ---
@@ -186,19 +501,7 @@ class TelegramBot:
         if not update.message:
             return
 
-        help_text = (
-            "📚 **Доступные команды:**\n\n"
-            "/start - Начать работу\n"
-            "/help - Показать эту справку\n"
-            "/status - Статус системы\n\n"
-            "📊 Статус - информация о системе\n"
-            "📝 Задачи - текущие задачи\n"
-            "📸 Скриншот - сделать скриншот\n"
-            "📦 Бэкап - информация о бэкапе\n\n"
-            "🎤 Голосовые сообщения - отправьте голосовое, я распознаю и отвечу\n\n"
-            "Просто напиши мне сообщение - я отвечу!"
-        )
-        await update.message.reply_text(help_text, parse_mode="Markdown")
+        await update.message.reply_text(HELP_TEXT, entities=HELP_ENTITIES)
 
     async def cmd_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Показывает статус системы"""
@@ -206,16 +509,14 @@ class TelegramBot:
             return
 
         status = self._get_component_status()
-        memory_text = f"{status['memory_count']} в памяти" if status["memory"] else "недоступно"
-
-        status_text = (
-            f"📊 **Статус системы:**\n\n"
-            f"🤖 Агент: Елена v0.1.0\n"
-            f"🧠 Память: {memory_text}\n"
-            f"🔊 Голос: {'✅' if status['voice'] else '❌'}\n"
-            f"👁️ Зрение: {'✅' if status['vision'] else '❌'}"
+        status_text = STATUS_TEMPLATE.format_map(
+            {
+                "memory": f"{status['memory_count']} в памяти" if status["memory"] else "недоступно",
+                "voice": "✅" if status["voice"] else "❌",
+                "vision": "✅" if status["vision"] else "❌",
+            }
         )
-        await update.message.reply_text(status_text, parse_mode="Markdown")
+        await update.message.reply_text(status_text, entities=STATUS_ENTITIES)
 
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработка текстовых сообщений с защитой от повторов"""
@@ -228,64 +529,92 @@ class TelegramBot:
         chat_id: int = update.effective_chat.id
 
         # Защита от повторной обработки того же сообщения
-        message_key = f"{chat_id}_{message_id}_{user_text}"
-        if message_key in self._processed_messages:
+        if self._seen((chat_id, message_id)):
             logger.debug(f"⏭️ Пропуск повторного сообщения {message_id}")
             return
 
-        self._processed_messages.add(message_key)
-
-        if len(self._processed_messages) > 100:
-            self._processed_messages.clear()
-
         # Защита от слишком частых сообщений
-        current_time = time.time()
-        last_time = self._last_message_time.get(chat_id, 0.0)
-
-        if current_time - last_time < 0.5:
+        if self._rate_limited(chat_id):
             logger.debug(f"⏱️ Слишком часто: {user.first_name}")
             return
 
-        self._last_message_time[chat_id] = current_time
-
         logger.info(f"💬 [Telegram {user.first_name}]: {user_text[:50]}...")
 
-        # Показываем "печатает..." с таймаутом
-        try:
-            await asyncio.wait_for(context.bot.send_chat_action(chat_id=chat_id, action="typing"), timeout=3.0)
-        except Exception as e:
-            logger.debug(f"⚠️ Не удалось отправить typing (не критично): {e}")
-
         # Обработка специальных команд
-        if user_text == "📊 Статус":
-            await self.cmd_status(update, context)
-            return
-        elif user_text == "📝 Задачи":
-            await update.message.reply_text(
-                "📝 **Текущие задачи:**\n" "• Мониторинг системы\n" "• Обработка запросов\n" "• Обучение на диалогах"
-            )
-            return
-        elif user_text == "📸 Скриншот":
-            await self._handle_screenshot(update, context)
-            return
-        elif user_text == "📦 Бэкап":
-            await update.message.reply_text(
-                "📦 **Бэкап системы:**\n" "• Память сохранена\n" "• Конфигурация в порядке\n" "• Все системы работают"
-            )
+        special_handler = self._special_handlers.get(user_text)
+        if special_handler:
+            await special_handler(update, context)
             return
 
         # Обычный диалог
-        agent_any = cast(Any, self.agent)
-        conversation = None
-        if hasattr(agent_any, "components"):
-            conversation = agent_any.components.get("conversation")
+        conversation = self._components.get("conversation")
 
         if conversation:
-            response = conversation.generate_response(user_text)
+            llm_task = asyncio.create_task(self._ask_llm(conversation, user_text))
+            try:
+                # Показываем "печатает...", только если ответ не пришёл сразу
+                done, _ = await asyncio.wait({llm_task}, timeout=TYPING_DELAY)
+                if not done:
+                    await self._send_typing(context, chat_id)
+                response = await llm_task
+            except TimeoutError:
+                logger.warning(f"⏳ LLM не ответила за {LLM_TIMEOUT} сек")
+                await update.message.reply_text(TIMEOUT_TEXT)
+                return
             await update.message.reply_text(response)
         else:
             await update.message.reply_text("Извини, я временно не могу ответить.")
 
+    async def _ask_llm(self, conversation: Any, text: str) -> str:
+        """
+        Запрос к LLM в пуле потоков с ограничением времени.
+        Короткие повторяющиеся фразы ("привет", "спасибо") отвечаются из кэша без запроса к LLM.
+
+        Raises:
+            TimeoutError: если ответ не получен за LLM_TIMEOUT секунд
+        """
+        cache_key = text.strip().lower()
+        response = self._get_cached_reply(cache_key)
+        if response is not None:
+            # generate_response озвучивает ответ на компьютере - ответ из кэша тоже должен прозвучать
+            voice = getattr(conversation, "voice", None)
+            if voice:
+                voice.speak(response)
+            return response
+
+        loop = asyncio.get_running_loop()
+        async with asyncio.timeout(LLM_TIMEOUT):
+            response = cast(str, await loop.run_in_executor(self._executor, conversation.generate_response, text))
+
+        if response and response != getattr(conversation, "ERROR_RESPONSE", None):
+            self._store_reply(cache_key, response)
+        return response
+
+    def _get_cached_reply(self, key: str) -> Optional[str]:
+        """Ответ из кэша, если он есть и ещё не устарел"""
+        entry = self._reply_cache.get(key)
+        if entry is None:
+            return None
+
+        response, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._reply_cache[key]
+            return None
+
+        self._reply_cache.move_to_end(key)
+        logger.debug(f"♻️ Ответ из кэша: {key[:50]}")
+        return response
+
+    def _store_reply(self, key: str, response: str) -> None:
+        """Сохранение ответа в кэш (только для коротких запросов)"""
+        if len(key) > REPLY_CACHE_MAX_TEXT:
+            return
+
+        self._reply_cache[key] = (response, time.monotonic() + REPLY_CACHE_TTL)
+        self._reply_cache.move_to_end(key)
+        if len(self._reply_cache) > REPLY_CACHE_SIZE:
+            self._reply_cache.popitem(last=False)
+
     async def handle_voice(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработка голосовых сообщений в Telegram"""
         if not update.message or not update.message.voice or not update.effective_user or not update.effective_chat:
@@ -298,88 +627,221 @@ class TelegramBot:
         logger.info(f"🎤 [Telegram {user.first_name}] Получено голосовое сообщение")
 
         # Защита от повторов
-        message_key = f"voice_{chat_id}_{message_id}"
-        if message_key in self._processed_messages:
+        if self._seen((chat_id, message_id)):
             logger.debug(f"⏭️ Пропуск повторного голосового сообщения {message_id}")
             return
 
-        self._processed_messages.add(message_key)
-        await update.message.reply_text("🎤 Обрабатываю голосовое сообщение...")
-
-        voice_path: Optional[Path] = None
-        wav_path: Optional[Path] = None
+        # Подтверждение уходит параллельно со скачиванием и распознаванием, а не перед ними
+        ack_task = asyncio.create_task(update.message.reply_text("🎤 Обрабатываю голосовое сообщение..."))
 
         try:
-            # Скачиваем голосовое
-            voice_file = await update.message.voice.get_file()
-            voice_path = Path(f"/tmp/telegram_voice_{chat_id}_{message_id}.ogg")
-            await voice_file.download_to_drive(voice_path)
-
-            # Конвертируем в wav для Whisper
-            wav_path = voice_path.with_suffix(".wav")
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", str(voice_path), "-ar", "16000", "-ac", "1", str(wav_path)], capture_output=True
-            )
+            components = self._components
+
+            # Пересланное голосовое имеет тот же file_unique_id - берём текст из кэша без скачивания
+            voice: Voice = update.message.voice
+            text = self._voice_cache.get(voice.file_unique_id)
+            if text is not None:
+                self._voice_cache.move_to_end(voice.file_unique_id)
+                logger.debug(f"♻️ Распознавание из кэша: {voice.file_unique_id}")
+            elif "audio" in components:
+                async with asyncio.timeout(STT_TIMEOUT):
+                    text = await self._transcribe_voice(voice)
+                if text:
+                    self._voice_cache[voice.file_unique_id] = text
+                    if len(self._voice_cache) > MEDIA_CACHE_SIZE:
+                        self._voice_cache.popitem(last=False)
 
-            agent_any = cast(Any, self.agent)
-            if hasattr(agent_any, "components") and "audio" in agent_any.components:
-                # Загружаем и распознаем через Whisper
-                model = whisper.load_model("base")
-                result = model.transcribe(str(wav_path), language="ru")
-                text = cast(str, result.get("text", "")).strip()
+            # Остальные ответы должны прийти после подтверждения
+            await ack_task
 
-                if text:
-                    await update.message.reply_text(f"📝 Распознано: {text}")
+            if text is None:
+                await update.message.reply_text("❌ Модуль распознавания речи не доступен")
+                return
+
+            if text:
+                conversation = components.get("conversation")
+                if conversation:
+                    # Запрос к LLM стартует сразу, а "Распознано" и typing уходят параллельно с ним
+                    llm_task = asyncio.create_task(self._ask_llm(conversation, text))
+                    try:
+                        await asyncio.gather(
+                            update.message.reply_text(f"📝 Распознано: {text}"),
+                            self._send_typing(context, chat_id),
+                        )
+                    except Exception:
+                        llm_task.cancel()
+                        raise
 
-                    # Отправляем в диалог
-                    conversation = agent_any.components.get("conversation")
-                    if conversation:
-                        await context.bot.send_chat_action(chat_id=chat_id, action="typing")
-                        response = conversation.generate_response(text)
-                        await update.message.reply_text(response)
-
-                        # Если есть голос, произносим ответ
-                        if "voice" in agent_any.components:
-                            agent_any.components["voice"].speak(response)
-                    else:
-                        await update.message.reply_text("🤖 Модуль диалога недоступен")
+                    response = await llm_task
+                    await update.message.reply_text(response)
+
+                    # Если есть голос, произносим ответ
+                    if "voice" in components:
+                        components["voice"].speak(response)
                 else:
-                    await update.message.reply_text("🤔 Не удалось распознать речь")
+                    await update.message.reply_text(f"📝 Распознано: {text}")
+                    await update.message.reply_text("🤖 Модуль диалога недоступен")
             else:
-                await update.message.reply_text("❌ Модуль распознавания речи не доступен")
+                await update.message.reply_text("🤔 Не удалось распознать речь")
 
+        except TimeoutError:
+            logger.warning("⏳ Превышено время обработки голосового сообщения")
+            await asyncio.gather(ack_task, return_exceptions=True)
+            await update.message.reply_text(TIMEOUT_TEXT)
         except Exception as e:
             logger.error(f"❌ Ошибка обработки голоса: {e}")
+            await asyncio.gather(ack_task, return_exceptions=True)
             await update.message.reply_text("❌ Ошибка при обработке голосового сообщения")
-        finally:
-            # Очищаем временные файлы
-            for p in [voice_path, wav_path]:
-                if p and p.exists():
-                    try:
-                        p.unlink()
-                    except Exception:
-                        pass
+
+    async def _transcribe_voice(self, voice: Voice) -> str:
+        """Скачивание голосового сообщения в память и распознавание через Whisper (без временных файлов)"""
+        voice_file = await voice.get_file()
+        ogg_bytes = bytes(await voice_file.download_as_bytearray())
+
+        audio = await self._decode_voice(ogg_bytes)
+
+        return await asyncio.get_running_loop().run_in_executor(self._whisper_pool, self._transcribe_audio, audio)
+
+    def _transcribe_audio(self, audio: np.ndarray) -> str:
+        """Распознавание PCM через Whisper (выполняется в пуле потоков)"""
+        # Whisper принимает numpy-массив напрямую - не нужен промежуточный wav на диске
+        return transcribe_text(self._get_whisper(), audio, language="ru")
+
+    async def _decode_voice(self, ogg_bytes: bytes) -> np.ndarray:
+        """Декодирование OGG/Opus в float32 PCM 16 кГц моно: PyAV в пуле потоков, иначе ffmpeg"""
+        if av is not None:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._decode_voice_av, ogg_bytes)
+        return await self._decode_voice_ffmpeg(ogg_bytes)
+
+    @staticmethod
+    def _decode_voice_av(ogg_bytes: bytes) -> np.ndarray:
+        """Декодирование в памяти через PyAV с ресемплингом в 16 кГц моно float32"""
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=16000)
+        chunks = []
+
+        with av.open(io.BytesIO(ogg_bytes)) as container:
+            for frame in container.decode(audio=0):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+
+        # Сброс остатка из буфера ресемплера
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(chunks).astype(np.float32, copy=False)
+
+    @staticmethod
+    async def _decode_voice_ffmpeg(ogg_bytes: bytes) -> np.ndarray:
+        """Декодирование через ffmpeg: stdin -> stdout, без диска"""
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-i",
+            "pipe:0",
+            "-f",
+            "s16le",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            pcm, _ = await proc.communicate(ogg_bytes)
+        except asyncio.CancelledError:
+            proc.kill()
+            raise
+
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg завершился с кодом {proc.returncode}")
+
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        audio *= np.float32(1.0 / 32768.0)  # на месте, без второго массива
+        return audio
+
+    def _get_whisper(self) -> Any:
+        """
+        Модель Whisper из общего кэша процесса (та же, что у AudioEngine при одинаковых настройках).
+        Имя модели и бэкенд можно переопределить переменными окружения WHISPER_MODEL и WHISPER_BACKEND;
+        audio.whisper_backend = "faster" - faster-whisper (CTranslate2, int8), в несколько раз быстрее на CPU.
+        Потокобезопасна (double-checked locking), вызывается из пула потоков.
+        """
+        model = self._whisper_model
+        if model is not None:
+            return model
+
+        with self._whisper_lock:
+            if self._whisper_model is None:
+                config: Dict[str, Any] = getattr(self.agent, "config", {})
+                audio_cfg: Dict[str, Any] = config.get("audio", {})
+                # Как у AudioEngine и AudioProcessor - тогда load_whisper_model вернёт ту же модель
+                cpu_threads = int(config.get("performance", {}).get("cpu_threads") or 0)
+                model_name = os.environ.get("WHISPER_MODEL") or audio_cfg.get("whisper_model", "base")
+                backend = os.environ.get("WHISPER_BACKEND") or audio_cfg.get("whisper_backend", "openai")
+
+                self._whisper_model = load_whisper_model(
+                    model_name,
+                    audio_cfg.get("device"),
+                    backend,
+                    cpu_threads,
+                    compile_encoder=audio_cfg.get("torch_compile", False),
+                    compute_type=audio_cfg.get("compute_type"),
+                )
+
+        return self._whisper_model
+
+    @staticmethod
+    def _encode_screenshot(img: Any) -> io.BytesIO:
+        """
+        Кодирование скриншота в памяти (выполняется в пуле потоков)
+
+        Экран с малым числом цветов (терминал, текст) - PNG, он сжимается отлично;
+        иначе JPEG: в разы меньше и быстрее PNG, а Telegram всё равно пережимает фото.
+        """
+        bio = io.BytesIO()
+        if img.getcolors(maxcolors=256) is not None:
+            bio.name = "screenshot.png"
+            img.save(bio, "PNG")
+        else:
+            bio.name = "screenshot.jpg"
+            img.convert("RGB").save(bio, "JPEG", quality=85)
+        bio.seek(0)
+        return bio
+
+    async def _reply_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Ответ на кнопку «📝 Задачи»"""
+        if update.message:
+            await update.message.reply_text(TASKS_TEXT, entities=TASKS_ENTITIES)
+
+    async def _reply_backup(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Ответ на кнопку «📦 Бэкап»"""
+        if update.message:
+            await update.message.reply_text(BACKUP_TEXT, entities=BACKUP_ENTITIES)
 
     async def _handle_screenshot(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик скриншота: 5 сек задержки и выбор экрана по мышке"""
         if not update.message:
             return
 
-        agent_any = cast(Any, self.agent)
-        vision = agent_any.components.get("vision") if hasattr(agent_any, "components") else None
+        vision = self._components.get("vision")
 
         if vision:
             await update.message.reply_text("⏳ У тебя есть 5 секунд, чтобы навести мышь на нужный монитор...")
             # Вызов асинхронного метода из VisionEngine
-            img = await cast(Any, vision).capture_screen(delay=5)
+            try:
+                async with asyncio.timeout(SCREENSHOT_TIMEOUT):
+                    img = await cast(Any, vision).capture_screen(delay=5)
+            except TimeoutError:
+                logger.warning(f"⏳ Скриншот не получен за {SCREENSHOT_TIMEOUT} сек")
+                img = None
 
             if img:
-                import io
-
-                bio = io.BytesIO()
-                bio.name = "screenshot.png"
-                img.save(bio, "PNG")
-                bio.seek(0)
+                # Сжатие PNG большого экрана занимает заметное время - делаем его вне event loop
+                bio = await asyncio.get_running_loop().run_in_executor(self._executor, self._encode_screenshot, img)
                 await update.message.reply_photo(photo=bio, caption="📸 Скриншот экрана, выбранного мышкой")
             else:
                 await update.message.reply_text("❌ Не удалось сделать скриншот.")
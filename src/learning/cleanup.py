@@ -2,12 +2,17 @@
 # Путь: /mnt/ai_data/ai-agent/src/learning/cleanup.py
 """Автоматическая очистка временных файлов и устаревших данных"""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import os
 import time
 import shutil
-import gc
 from loguru import logger
 
+# Потоков для параллельного удаления файлов
+CLEANUP_WORKERS = 8
+
 
 class CleanupManager:
     """Менеджер автоматической очистки"""
@@ -53,9 +58,6 @@ class CleanupManager:
             cleaned += cleaned_logs
             freed_space += freed_logs
 
-            # Запускаем сборщик мусора Python
-            gc.collect()
-
             if cleaned > 0:
                 logger.success(f"✅ Очищено {cleaned} файлов, " f"освобождено {freed_space / (1024*1024):.1f} MB")
             else:
@@ -74,31 +76,25 @@ class CleanupManager:
         if not directory.exists():
             return 0, 0
 
-        now = time.time()
-        cleaned = 0
-        freed = 0
-
+        cleaned, freed = 0, 0
         try:
-            for item in directory.glob("*"):
-                if item.is_file():
-                    # Проверяем возраст файла
-                    age = now - item.stat().st_mtime
-                    if age > max_age:
-                        size = item.stat().st_size
-                        item.unlink()
-                        cleaned += 1
-                        freed += size
-                        logger.debug(f"   Удалён {name}: {item.name} (возраст: {age/3600:.1f} ч)")
+            cleaned, freed = self._remove_files(self._stale_files(directory, max_age), name)
 
             # Удаляем пустые поддиректории
-            for item in directory.glob("*"):
-                if item.is_dir() and not any(item.iterdir()):
-                    item.rmdir()
-                    logger.debug(f"   Удалена пустая папка: {item.name}")
+            with os.scandir(directory) as entries:
+                subdirs = [e for e in entries if e.is_dir(follow_symlinks=False)]
+            for entry in subdirs:
+                try:
+                    if not os.listdir(entry.path):
+                        os.rmdir(entry.path)
+                        logger.debug(f"   Удалена пустая папка: {entry.name}")
+                except OSError as e:
+                    logger.debug(f"   Папка {entry.name} не удалена: {e}")
 
         except Exception as e:
             logger.error(f"❌ Ошибка при очистке {directory}: {e}")
 
+        # Уже удалённое учитывается и при ошибке
         return cleaned, freed
 
     def _clean_logs(self):
@@ -106,40 +102,76 @@ class CleanupManager:
         if not self.logs_dir.exists():
             return 0, 0
 
-        cleaned = 0
-        freed = 0
-        now = time.time()
-
         try:
-            for log_file in self.logs_dir.glob("*.log*"):
-                if log_file.is_file():
-                    # Удаляем логи старше log_max_age
-                    age = now - log_file.stat().st_mtime
-                    if age > self.log_max_age:
-                        size = log_file.stat().st_size
-                        log_file.unlink()
-                        cleaned += 1
-                        freed += size
-                        logger.debug(f"   Удалён старый лог: {log_file.name}")
+            # Удаляем логи (app.log, app.log.1.zip, ...) старше log_max_age
+            stale = self._stale_files(self.logs_dir, self.log_max_age, ".log")
+            return self._remove_files(stale, "старый лог")
         except Exception as e:
             logger.error(f"❌ Ошибка при очистке логов: {e}")
+            return 0, 0
 
-        return cleaned, freed
+    def _stale_files(self, directory: Path, max_age: int, name_part: str = ""):
+        """
+        Файлы старше max_age за один проход os.scandir
+
+        Тип файла приходит вместе с записью каталога, а stat делается один раз на файл
+        (Path.glob + is_file + два .stat() давали до трёх системных вызовов).
 
-    def schedule_cleanup(self, hours=24):
+        Returns:
+            список (путь, размер, возраст в секундах)
+        """
+        now = time.time()
+        stale = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if name_part not in entry.name or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError as e:
+                    # Файл удалён или недоступен между чтением каталога и stat
+                    logger.debug(f"   Пропущен {entry.name}: {e}")
+                    continue
+                age = now - st.st_mtime
+                if age > max_age:
+                    stale.append((entry.path, st.st_size, age))
+        return stale
+
+    def _remove_files(self, stale, name: str):
         """
-        Запланировать периодическую очистку
+        Удаление файлов пулом потоков: unlink упирается в ожидание диска, а не в CPU
 
-        Args:
-            hours: интервал в часах
+        Returns:
+            (количество удалённых файлов, освобождённое место в байтах)
         """
-        import threading
+        if not stale:
+            return 0, 0
+
+        def remove(item):
+            path, size, age = item
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.debug(f"   Не удалён {path}: {e}")
+                return None
+            logger.debug(f"   Удалён {name}: {os.path.basename(path)} (возраст: {age/3600:.1f} ч)")
+            return size
 
-        def cleanup_loop():
-            while True:
-                time.sleep(hours * 3600)
-                self.cleanup_now()
+        with ThreadPoolExecutor(max_workers=min(CLEANUP_WORKERS, len(stale))) as pool:
+            removed = [size for size in pool.map(remove, stale) if size is not None]
 
-        thread = threading.Thread(target=cleanup_loop, daemon=True)
-        thread.start()
+        return len(removed), sum(removed)
+
+    async def schedule_cleanup(self, hours=24):
+        """
+        Периодическая очистка; запускается задачей asyncio и останавливается её отменой
+
+        Args:
+            hours: интервал в часах
+        """
         logger.info(f"⏰ Запланирована очистка каждые {hours} часов")
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(hours * 3600)
+            # Удаление файлов - блокирующий ввод-вывод, цикл событий не ждёт его
+            await loop.run_in_executor(None, self.cleanup_now)
@@ -4,8 +4,24 @@
 
 from loguru import logger
 import json
+from dataclasses import asdict, dataclass
 from datetime import datetime
-import gc
+
+# orjson (ставится вместе с chromadb) в разы быстрее стандартного json и сразу пишет UTF-8
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+
+@dataclass(slots=True)
+class PerfStats:
+    """Статистика оценок (слоты вместо словаря: атрибуты без хэширования строковых ключей)"""
+
+    total_interactions: int = 0
+    successful: int = 0
+    failed: int = 0
+    average_rating: float = 0.0
 
 
 class SelfImprovement:
@@ -13,7 +29,9 @@ class SelfImprovement:
 
     def __init__(self, memory):
         self.memory = memory
-        self.performance_stats = {"total_interactions": 0, "successful": 0, "failed": 0, "average_rating": 0.0}
+        self.performance_stats = PerfStats()
+        # Удачные диалоги пишутся в векторную память пачками, как опыт в MemoryCore
+        self._dialogs = memory.vector.batch_writer()
         logger.info("📚 SelfImprovement инициализирован")
 
     def learn_from_feedback(self, query: str, response: str, rating: int) -> None:
@@ -26,28 +44,35 @@ class SelfImprovement:
             rating: оценка (1-5)
         """
         try:
-            self.performance_stats["total_interactions"] += 1
+            stats = self.performance_stats
+            stats.total_interactions += 1
 
             if rating >= 4:
-                self.performance_stats["successful"] += 1
+                stats.successful += 1
                 # Сохраняем удачный диалог в память
-                self.memory.vector.add(
+                self._dialogs.add(
                     f"Q: {query}\nA: {response}",
-                    {"type": "positive_dialog", "rating": rating, "timestamp": str(datetime.now())},
+                    {
+                        "type": "positive_dialog",
+                        "rating": rating,
+                        "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    },
                 )
-                logger.info(f"✅ Диалог сохранён в память (оценка: {rating}/5)")
+                logger.info(f"✅ Диалог поставлен в очередь на сохранение в память (оценка: {rating}/5)")
             else:
-                self.performance_stats["failed"] += 1
+                stats.failed += 1
                 logger.info(f"📝 Получена низкая оценка ({rating}/5), требуется улучшение")
 
-            # Обновляем среднюю оценку
-            total = self.performance_stats["total_interactions"]
-            current_avg = self.performance_stats["average_rating"]
-            self.performance_stats["average_rating"] = (current_avg * (total - 1) + rating) / total
+            # Обновляем среднюю оценку инкрементально - без умножения и вычитания большой суммы
+            stats.average_rating += (rating - stats.average_rating) / stats.total_interactions
 
         except Exception as e:
             logger.error(f"❌ Ошибка в learn_from_feedback: {e}")
 
+    def flush(self) -> None:
+        """Запись накопленных диалогов в векторную память одной пачкой"""
+        self._dialogs.flush()
+
     def self_critique(self, last_actions: list | None = None) -> None:
         """
         Анализирует недавние действия и предлагает улучшения
@@ -90,9 +115,10 @@ class SelfImprovement:
     def _store_issues(self, issues):
         """Сохраняет проблемы в память для анализа"""
         try:
+            timestamp = datetime.now().isoformat(timespec="seconds")
             self.memory.vector.add(
-                json.dumps(issues, ensure_ascii=False),
-                {"type": "self_critique", "timestamp": str(datetime.now()), "count": len(issues)},
+                _dumps(issues),
+                {"type": "self_critique", "timestamp": timestamp, "count": len(issues)},
             )
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения проблем: {e}")
@@ -100,11 +126,12 @@ class SelfImprovement:
     def get_stats(self):
         """Получить статистику производительности"""
         try:
-            success_rate = 0
-            if self.performance_stats["total_interactions"] > 0:
-                success_rate = self.performance_stats["successful"] / self.performance_stats["total_interactions"] * 100
+            stats = self.performance_stats
+            success_rate = 0.0
+            if stats.total_interactions > 0:
+                success_rate = stats.successful / stats.total_interactions * 100
 
-            return {**self.performance_stats, "success_rate": f"{success_rate:.1f}%"}
+            return {**asdict(stats), "success_rate": f"{success_rate:.1f}%"}
         except Exception as e:
             logger.error(f"❌ Ошибка получения статистики: {e}")
             return {}
@@ -112,8 +139,18 @@ class SelfImprovement:
     def cleanup(self):
         """Очистка ресурсов"""
         try:
-            # Очищаем статистику при необходимости
-            gc.collect()
+            self.flush()
             logger.info("🧹 SelfImprovement: ресурсы очищены")
         except Exception as e:
             logger.error(f"❌ Ошибка очистки: {e}")
+
+
+def _dumps(data) -> str:
+    """JSON с кириллицей как есть: через orjson, если он установлен"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # Типы, которые orjson не сериализует (например, целые больше 64 бит)
+            pass
+    return json.dumps(data, ensure_ascii=False)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# Путь: /mnt/ai_data/ai-agent/src/memory/batch_writer.py
+"""Пакетная запись в векторную память: одно кодирование и одна запись ChromaDB на пачку"""
+
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+
+BATCH_SIZE = 32
+FLUSH_INTERVAL = 5.0  # секунд - дольше запись не откладывается
+
+
+class BatchWriter:
+    """
+    Очередь записей для VectorMemory.add_batch
+
+    Пачка пишется, когда набралось batch_size записей или по таймеру через flush_interval
+    секунд после первой записи в очереди - даже если новых записей больше не приходит.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[str], List[dict]], object],
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[str, dict]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        # Держится на всё время записи пачки: flush() из другого потока дожидается уже идущей записи
+        self._flush_lock = threading.Lock()
+
+    def add(self, text: str, metadata: dict) -> None:
+        """Постановка записи в очередь"""
+        with self._lock:
+            self._pending.append((text, metadata))
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Запись всей очереди одной пачкой
+
+        Возвращается только после того, как записано всё, что было в очереди к моменту вызова,
+        в том числе пачка, которую в этот момент пишет другой поток (таймер или add).
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, []
+
+            if not pending:
+                return
+
+            try:
+                self._write([text for text, _ in pending], [metadata for _, metadata in pending])
+            except Exception as e:
+                logger.error(f"❌ Ошибка пакетной записи в память: {e}")
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -4,6 +4,7 @@
 
 from pathlib import Path
 import pickle
+import time
 from loguru import logger
 from src.memory.vector_memory import VectorMemory
 
@@ -21,6 +22,9 @@ class MemoryCore:
         # Кратковременная память (кэш)
         self.short_term = {}
 
+        # Опыт пишется в векторную память пачками: по 32 записи или по таймеру раз в 5 секунд
+        self._experiences = self.vector.batch_writer()
+
         # Загрузка сохранённого состояния
         self.load_state()
 
@@ -35,13 +39,11 @@ class MemoryCore:
             plan: выполненный план
             result: результат выполнения
         """
-        # Сохраняем в векторную память для долгосрочного хранения
+        # Сохраняем в векторную память для долгосрочного хранения (пачкой, см. flush)
         experience = f"Perception: {perception}\nPlan: {plan}\nResult: {result}"
-        self.vector.add(experience, {"type": "experience"})
+        self._experiences.add(experience, {"type": "experience"})
 
         # Сохраняем в кратковременную память
-        import time
-
         self.short_term[time.time()] = {"perception": perception, "plan": plan, "result": result}
 
         # Ограничиваем размер кратковременной памяти
@@ -49,12 +51,17 @@ class MemoryCore:
             oldest = min(self.short_term.keys())
             del self.short_term[oldest]
 
+    def flush(self):
+        """Запись накопленного опыта в векторную память одной пачкой"""
+        self._experiences.flush()
+
     def recall(self, query, n_results=5):
-        """Поиск в памяти по запросу"""
+        """Поиск в памяти по запросу (накопленный опыт VectorMemory дописывает перед поиском)"""
         return self.vector.search(query, n_results)
 
     def save_state(self):
         """Сохранение состояния памяти в файл"""
+        self.flush()
         try:
             state = {
                 "short_term": self.short_term,
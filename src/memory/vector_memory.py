@@ -7,11 +7,23 @@ from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 from loguru import logger
 from pathlib import Path
+from src.memory.batch_writer import BATCH_SIZE, FLUSH_INTERVAL, BatchWriter
 import hashlib
+import itertools
+import json
+import threading
+from collections import OrderedDict
 import time
+import numpy as np
 import gc
 import torch
 
+# Сколько текстов encoder обрабатывает за один прямой проход в add_batch/search_many
+ENCODE_BATCH_SIZE = 32
+
+# Сколько точных повторов запросов хранит кэш поиска по умолчанию (memory.exact_cache_size)
+EXACT_CACHE_SIZE = 2048
+
 
 class VectorMemory:
     """Векторная память для долговременного хранения"""
@@ -28,22 +40,114 @@ class VectorMemory:
 
         self.collection_name = config["memory"]["collection_name"]
 
+        # Очереди пакетной записи (MemoryCore, SelfImprovement): перед чтением они дописываются
+        self._writers: list[BatchWriter] = []
+
         # Инициализация ChromaDB
         self.client = chromadb.PersistentClient(
             path=str(self.persist_dir), settings=Settings(anonymized_telemetry=False)
         )
 
-        # Создаём или получаем коллекцию
-        self.collection = self.client.get_or_create_collection(name=self.collection_name)
+        # Создаём или получаем коллекцию. Эмбеддинги нормированы - новые коллекции сразу с косинусной метрикой
+        # (у уже созданных метрика не меняется, но для единичных векторов порядок по L2 тот же)
+        self.collection = self.client.get_or_create_collection(
+            name=self.collection_name, metadata={"hnsw:space": "cosine"}
+        )
 
-        # Модель для создания эмбеддингов (принудительно на CPU)
-        logger.info("📥 Загрузка SentenceTransformer (all-MiniLM-L6-v2) на CPU...")
-        self.encoder = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")  # Всегда на CPU, чтобы не занимать GPU
-        logger.success("✅ SentenceTransformer загружен на CPU")
+        # Модель для создания эмбеддингов: по умолчанию на CPU, чтобы не занимать GPU (его делят LLM и nanoLLaVA)
+        device = config["memory"].get("encoder_device", "cpu")
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        backend = config["memory"].get("encoder_backend", "torch")
+        logger.info(f"📥 Загрузка SentenceTransformer (all-MiniLM-L6-v2, {backend}) на {device}...")
+        self.encoder = self._load_encoder(device, backend)
+        if device.startswith("cuda") and backend == "torch":
+            # fp16 на GPU: вдвое меньше памяти и быстрее; для поиска по сходству точности хватает
+            self.encoder.half()
+        # Длинные тексты обрезаются: стоимость внимания растёт с квадратом длины, а смысл опыта - в начале
+        self.encoder.max_seq_length = int(config["memory"].get("max_seq_length", 128))
+        logger.success(f"✅ SentenceTransformer загружен на {device}")
+
+        self._id_counter = itertools.count(time.time_ns())
+
+        # Семантический кэш поиска: эмбеддинги прошлых запросов (кольцевой буфер) и их результаты
+        self._sem_threshold = float(config["memory"].get("semantic_cache_threshold", 0.95))
+        self._sem_size = int(config["memory"].get("semantic_cache_size", 1024))
+        self._sem_emb = None  # np.ndarray [size, dim], создаётся при первом поиске
+        self._sem_params = None  # np.ndarray [size]: номер параметров поиска для каждой строки _sem_emb
+        self._sem_param_ids: dict = {}  # (n_results, фильтр) -> номер
+        self._sem_val: list = []  # результаты для каждой строки _sem_emb
+        self._sem_next = 0
+        self._sem_count = 0
+        # LRU точных повторов: (нормализованный запрос, параметры поиска) -> результаты
+        self._exact_size = int(config["memory"].get("exact_cache_size", EXACT_CACHE_SIZE))
+        self._exact_cache: OrderedDict = OrderedDict()
+        self._cache_generation = 0  # растёт при каждом сбросе кэша
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         logger.info(f"🧠 VectorMemory инициализирована: {self.persist_dir}")
         logger.info(f"   📊 Всего записей: {self.count()}")
 
+    @staticmethod
+    def _load_encoder(device: str, backend: str):
+        """
+        SentenceTransformer на PyTorch или на ONNX Runtime / OpenVINO
+
+        ONNX Runtime и OpenVINO выполняют граф со слитыми операциями без накладных расходов PyTorch -
+        на CPU короткие тексты кодируются в 2-4 раза быстрее. Модель экспортируется при первой загрузке.
+        """
+        if backend != "torch":
+            try:
+                model_kwargs = {"provider": "CPUExecutionProvider"} if backend == "onnx" and device == "cpu" else None
+                return SentenceTransformer(
+                    "all-MiniLM-L6-v2", device=device, backend=backend, model_kwargs=model_kwargs
+                )
+            except TypeError:
+                # Параметр backend появился в sentence-transformers 3.2
+                logger.warning(f"⚠️ Бэкенд {backend} требует sentence-transformers>=3.2, используется torch")
+            except Exception as e:
+                logger.warning(f"⚠️ Бэкенд {backend} недоступен ({e}), используется torch")
+
+        return SentenceTransformer("all-MiniLM-L6-v2", device=device)
+
+    def batch_writer(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL) -> BatchWriter:
+        """
+        Очередь пакетной записи в эту память (через add_batch)
+
+        Перед любым чтением (search, get_all, count) очередь дописывается, а пачка, которую в этот момент
+        пишет другой поток, дожидается: чтение видит всё, что было поставлено в очередь до него.
+        """
+        writer = BatchWriter(self.add_batch, batch_size, flush_interval)
+        self._writers.append(writer)
+        return writer
+
+    def flush_writers(self) -> None:
+        """Запись всех очередей пакетной записи"""
+        for writer in self._writers:
+            writer.flush()
+
+    def _make_id(self, text: str) -> str:
+        """
+        Уникальный ID записи: короткий хэш текста и номер из счётчика
+
+        Счётчик начинается с текущего времени в наносекундах, поэтому ID не повторяются и после перезапуска
+        (ChromaDB молча пропускает запись с уже существующим ID).
+        """
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=5).hexdigest()
+        return f"doc_{digest}{next(self._id_counter):x}"
+
+    def _encode(self, texts):
+        """Нормированные эмбеддинги (косинус = скалярное произведение) без прогресс-бара tqdm"""
+        return self.encoder.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            show_progress_bar=False,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+
     def add(self, text: str, metadata: dict | None = None) -> str | None:
         """
         Добавление текста в векторную память
@@ -56,11 +160,9 @@ class VectorMemory:
             ID добавленной записи или None при ошибке
         """
         try:
-            embedding = self.encoder.encode(text).tolist()
+            embedding = self._encode(text).tolist()
 
-            # Генерируем уникальный ID
-            unique_id = hashlib.md5(f"{text}{time.time()}".encode()).hexdigest()[:10]
-            doc_id = f"doc_{unique_id}"
+            doc_id = self._make_id(text)
 
             # Подготавливаем метаданные
             if metadata is None:
@@ -68,6 +170,7 @@ class VectorMemory:
             metadata["timestamp"] = time.time()
 
             self.collection.add(documents=[text], embeddings=[embedding], metadatas=[metadata], ids=[doc_id])
+            self.clear_cache()
 
             logger.debug(f"📝 Добавлено в векторную память: {text[:50]}... (ID: {doc_id})")
             return doc_id
@@ -76,46 +179,203 @@ class VectorMemory:
             logger.error(f"❌ Ошибка добавления в векторную память: {e}")
             return None
 
-    def search(self, query: str, n_results: int = 5):
+    def add_batch(self, texts: list[str], metadatas: list[dict] | None = None) -> list[str]:
+        """
+        Добавление нескольких текстов за раз: один вызов encoder и одна запись в ChromaDB
+
+        Args:
+            texts: тексты для сохранения
+            metadatas: метаданные для каждого текста (опционально)
+
+        Returns:
+            список ID добавленных записей (пустой при ошибке)
+        """
+        if not texts:
+            return []
+
+        try:
+            embeddings = self._encode(texts).tolist()
+
+            now = time.time()
+            ids = [self._make_id(text) for text in texts]
+            metas = [dict(m) if m else {} for m in (metadatas or [{}] * len(texts))]
+            for meta in metas:
+                meta["timestamp"] = now
+
+            self.collection.add(documents=texts, embeddings=embeddings, metadatas=metas, ids=ids)
+            self.clear_cache()
+
+            logger.debug(f"📝 Добавлено в векторную память: {len(texts)} записей")
+            return ids
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка пакетного добавления в векторную память: {e}")
+            return []
+
+    def search(self, query: str, n_results: int = 5, where: dict | None = None):
         """
         Поиск в векторной памяти
 
         Args:
             query: поисковый запрос
             n_results: количество результатов
+            where: фильтр по метаданным ChromaDB (например, {"type": "positive_dialog"})
 
         Returns:
             список найденных документов
         """
+        results = self.search_many([query], n_results, where)
+        formatted_results = results[0] if results else []
+        logger.debug(f"🔍 Поиск '{query}': найдено {len(formatted_results)} результатов")
+        return formatted_results
+
+    def search_many(self, queries: list[str], n_results: int = 5, where: dict | None = None):
+        """
+        Поиск по нескольким запросам за раз: один вызов encoder и один запрос к ChromaDB
+
+        Args:
+            queries: поисковые запросы
+            n_results: количество результатов на запрос
+            where: фильтр по метаданным ChromaDB
+
+        Returns:
+            для каждого запроса - список найденных документов (пустой список при ошибке)
+        """
+        if not queries:
+            return []
+
+        # Недавние записи должны находиться сразу, даже если пачка ещё не набралась
+        self.flush_writers()
+
         try:
-            query_emb = self.encoder.encode(query).tolist()
-
-            results = self.collection.query(query_embeddings=[query_emb], n_results=n_results)
-
-            documents = results["documents"][0] if results["documents"] else []
-            distances = results["distances"][0] if results["distances"] else []
-            metadatas = results["metadatas"][0] if results["metadatas"] else []
-            ids = results["ids"][0] if results["ids"] else []
-
-            # Формируем результаты с метаданными
-            formatted_results = []
-            for i, doc in enumerate(documents):
-                formatted_results.append(
-                    {
-                        "text": doc,
-                        "distance": distances[i] if i < len(distances) else None,
-                        "metadata": metadatas[i] if i < len(metadatas) else {},
-                        "id": ids[i] if i < len(ids) else None,
-                    }
+            # Точный повтор запроса (перепланирование, повторная попытка) - без encoder и ChromaDB
+            # Параметры поиска входят в ключи обоих кэшей: результат с другим n_results или фильтром не подходит
+            params = (n_results, json.dumps(where, sort_keys=True, default=str) if where else "")
+            keys = [(query.strip().lower(), params) for query in queries]
+            with self._cache_lock:
+                generation = self._cache_generation
+                found = [self._exact_lookup(key) for key in keys]
+            pending = [q for q, cached in enumerate(found) if cached is None]
+            if not pending:
+                self.cache_hits += len(queries)
+                return found
+
+            query_embs = self._encode([queries[q] for q in pending])
+
+            # Затем семантический кэш: почти тот же вопрос - те же результаты без запроса к ChromaDB
+            with self._cache_lock:
+                for k, q in enumerate(pending):
+                    found[q] = self._cache_lookup(query_embs[k], params)
+            misses = [k for k, q in enumerate(pending) if found[q] is None]
+            self.cache_hits += len(queries) - len(misses)
+            self.cache_misses += len(misses)
+
+            if misses:
+                results = self.collection.query(
+                    query_embeddings=query_embs[misses].tolist(), n_results=n_results, where=where
                 )
 
-            logger.debug(f"🔍 Поиск '{query}': найдено {len(formatted_results)} результатов")
-            return formatted_results
+                all_documents = results["documents"] or []
+                all_distances = results["distances"] or []
+                all_metadatas = results["metadatas"] or []
+                all_ids = results["ids"] or []
+
+                # Формируем результаты с метаданными
+                for j, k in enumerate(misses):
+                    documents = all_documents[j] if j < len(all_documents) else []
+                    distances = all_distances[j] if j < len(all_distances) else []
+                    metadatas = all_metadatas[j] if j < len(all_metadatas) else []
+                    ids = all_ids[j] if j < len(all_ids) else []
+                    found[pending[k]] = [
+                        {
+                            "text": doc,
+                            "distance": distances[i] if i < len(distances) else None,
+                            "metadata": metadatas[i] if i < len(metadatas) else {},
+                            "id": ids[i] if i < len(ids) else None,
+                        }
+                        for i, doc in enumerate(documents)
+                    ]
+
+            with self._cache_lock:
+                # Пока шёл запрос, память могла измениться - тогда результаты уже не кэшируем
+                if generation == self._cache_generation:
+                    for k in misses:
+                        self._cache_store(query_embs[k], params, found[pending[k]])
+                    for q in pending:
+                        self._exact_store(keys[q], found[q])
+
+            return found
 
         except Exception as e:
             logger.error(f"❌ Ошибка поиска в векторной памяти: {e}")
             return []
 
+    def _exact_lookup(self, key):
+        """Результаты точно такого же запроса (под _cache_lock)"""
+        cached = self._exact_cache.get(key)
+        if cached is None:
+            return None
+        self._exact_cache.move_to_end(key)
+        return _copy_results(cached)
+
+    def _exact_store(self, key, results: list) -> None:
+        """Запоминание результатов запроса в LRU точных совпадений (под _cache_lock)"""
+        if self._exact_size <= 0:
+            return
+
+        self._exact_cache[key] = _copy_results(results)
+        self._exact_cache.move_to_end(key)
+        if len(self._exact_cache) > self._exact_size:
+            self._exact_cache.popitem(last=False)
+
+    def _cache_lookup(self, emb, params):
+        """
+        Результаты самого похожего прошлого запроса с теми же параметрами поиска,
+        если сходство не ниже порога (под _cache_lock)
+        """
+        param_id = self._sem_param_ids.get(params)
+        if not self._sem_count or param_id is None:
+            return None
+
+        # Эмбеддинги нормированы: скалярное произведение - косинусное сходство.
+        # Записи с другими параметрами исключаются до выбора лучшей
+        sims = self._sem_emb[: self._sem_count] @ emb
+        sims[self._sem_params[: self._sem_count] != param_id] = -np.inf
+        best = int(sims.argmax())
+        if sims[best] >= self._sem_threshold:
+            return _copy_results(self._sem_val[best])
+        return None
+
+    def _cache_store(self, emb, params, results: list) -> None:
+        """Запоминание результатов запроса; при переполнении вытесняется самая старая запись (под _cache_lock)"""
+        if self._sem_size <= 0:
+            return
+
+        if self._sem_emb is None:
+            self._sem_emb = np.empty((self._sem_size, emb.shape[0]), dtype=np.float32)
+            self._sem_params = np.empty(self._sem_size, dtype=np.int64)
+
+        i = self._sem_next
+        self._sem_emb[i] = emb
+        self._sem_params[i] = self._sem_param_ids.setdefault(params, len(self._sem_param_ids))
+        results = _copy_results(results)
+        if i < len(self._sem_val):
+            self._sem_val[i] = results
+        else:
+            self._sem_val.append(results)
+        self._sem_next = (i + 1) % self._sem_size
+        self._sem_count = min(self._sem_count + 1, self._sem_size)
+
+    def clear_cache(self) -> None:
+        """Сброс кэша поиска (после любой записи или удаления результаты могли измениться)"""
+        with self._cache_lock:
+            self._exact_cache.clear()
+            self._sem_val.clear()
+            self._sem_param_ids.clear()
+            self._sem_next = 0
+            self._sem_count = 0
+            self._cache_generation += 1
+
     def search_text(self, query: str, n_results: int = 5):
         """
         Поиск в векторной памяти (только текст, для обратной совместимости)
@@ -141,6 +401,7 @@ class VectorMemory:
             список записей
         """
         try:
+            self.flush_writers()
             results = self.collection.get(limit=limit)
 
             items = []
@@ -163,6 +424,7 @@ class VectorMemory:
     def count(self):
         """Количество записей в памяти"""
         try:
+            self.flush_writers()
             return self.collection.count()
         except Exception as e:
             logger.error(f"❌ Ошибка получения количества: {e}")
@@ -182,6 +444,7 @@ class VectorMemory:
         try:
             if ids:
                 self.collection.delete(ids=ids)
+                self.clear_cache()
                 logger.info(f"🗑️ Удалено {len(ids)} записей из векторной памяти")
                 return True
             elif where:
@@ -189,6 +452,7 @@ class VectorMemory:
                 results = self.collection.get(where=where)
                 if results and "ids" in results and results["ids"]:
                     self.collection.delete(ids=results["ids"])
+                    self.clear_cache()
                     logger.info(f"🗑️ Удалено {len(results['ids'])} записей по условию {where}")
                     return True
             else:
@@ -206,6 +470,7 @@ class VectorMemory:
             results = self.collection.get()
             if results and "ids" in results and results["ids"]:
                 self.collection.delete(ids=results["ids"])
+                self.clear_cache()
                 logger.info(f"🗑️ Очищена вся векторная память (удалено {len(results['ids'])} записей)")
             return True
         except Exception as e:
@@ -214,7 +479,13 @@ class VectorMemory:
 
     def get_stats(self):
         """Получение статистики памяти"""
-        return {"total_records": self.count(), "collection": self.collection_name, "persist_dir": str(self.persist_dir)}
+        return {
+            "total_records": self.count(),
+            "collection": self.collection_name,
+            "persist_dir": str(self.persist_dir),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
 
     def cleanup(self):
         """Очистка ресурсов"""
@@ -231,3 +502,8 @@ class VectorMemory:
 
         except Exception as e:
             logger.error(f"❌ Ошибка очистки ресурсов: {e}")
+
+
+def _copy_results(results: list) -> list:
+    """Копия результатов поиска: изменения у вызывающего не должны попадать в кэш и обратно"""
+    return [{**r, "metadata": dict(r["metadata"]) if r.get("metadata") else r.get("metadata")} for r in results]
@@ -12,6 +12,9 @@ import gc
 class ConversationTools:
     """Инструменты для ведения диалога через Ollama"""
 
+    # Ответ при сбое Ollama (его не стоит кэшировать или запоминать)
+    ERROR_RESPONSE = "Извини, Татьяна, у меня что-то пошло не так с мыслями. Попробуй еще раз."
+
     def __init__(self, config, memory=None, voice=None):
         """
         Args:
@@ -75,7 +78,7 @@ class ConversationTools:
 
         except Exception as e:
             logger.error(f"❌ Ошибка Ollama: {e}")
-            return "Извини, Татьяна, у меня что-то пошло не так с мыслями. Попробуй еще раз."
+            return self.ERROR_RESPONSE
 
     async def execute(self, plan):
         """Выполнение плана через генерацию ответа"""
@@ -2,40 +2,53 @@
 # Путь: /mnt/ai_data/ai-agent/src/tools/media/audio_processor.py
 """Обработка аудио файлов"""
 
-import whisper  # type: ignore[import-untyped]
 from pydub import AudioSegment  # type: ignore[import-untyped]
 from pathlib import Path
 from loguru import logger
 import os
 
+from src.engines.whisper_models import load_whisper_model, transcribe_text
+
+# libsndfile читает параметры из заголовка файла, не декодируя его целиком (pydub гоняет весь файл через ffmpeg)
+try:
+    import soundfile as sf  # type: ignore[import-untyped]
+except ImportError:
+    sf = None
+
+# Байт на сэмпл для подтипов libsndfile; сжатые форматы pydub тоже отдаёт как 16 бит
+_SAMPLE_WIDTHS = {"PCM_U8": 1, "PCM_S8": 1, "PCM_16": 2, "PCM_24": 3, "PCM_32": 4, "FLOAT": 4, "DOUBLE": 8}
+
 os.environ["WHISPER_CACHE_DIR"] = "/tmp/whisper_cache"  # временная папка
 
+# Сколько 30-секундных фрагментов файла распознаётся за один проход (только faster-whisper)
+TRANSCRIBE_BATCH_SIZE = 8
+
 
 class AudioProcessor:
     """Обработчик аудио"""
 
     def __init__(self, config):
         self.config = config
+        # Модель грузится при первом распознавании: whisper тянет torch, а ToolExecutor создаёт процессор всегда
         self.whisper_model = None
-        self._load_whisper()
         logger.info("🎵 AudioProcessor инициализирован")
 
     def _load_whisper(self):
-        """Ленивая загрузка Whisper модели с проверкой папки"""
+        """Ленивая загрузка Whisper модели (папку ~/.cache/whisper whisper создаёт сам при скачивании весов)"""
         try:
-            # Проверяем, существует ли папка
-            cache_dir = Path.home() / ".cache" / "whisper"
-            if not cache_dir.exists():
-                cache_dir.mkdir(parents=True, exist_ok=True)
-                logger.info(f"📁 Создана папка для Whisper: {cache_dir}")
-            else:
-                logger.debug(f"📁 Папка Whisper уже существует: {cache_dir}")
-
-            os.environ["WHISPER_CACHE_DIR"] = str(cache_dir)
+            os.environ["WHISPER_CACHE_DIR"] = str(Path.home() / ".cache" / "whisper")
 
-            # Загружаем модель (только если ещё не загружена)
+            # Загружаем модель (только если ещё не загружена) - та же, что у AudioEngine
             if not hasattr(self, "whisper_model") or self.whisper_model is None:
-                self.whisper_model = whisper.load_model("base")
+                audio_cfg = self.config.get("audio", {})
+                self.whisper_model = load_whisper_model(
+                    audio_cfg.get("whisper_model", "base"),
+                    audio_cfg.get("device"),
+                    audio_cfg.get("whisper_backend", "openai"),
+                    self.config.get("performance", {}).get("cpu_threads", 0),
+                    compile_encoder=audio_cfg.get("torch_compile", False),
+                    compute_type=audio_cfg.get("compute_type"),
+                )
                 logger.info("✅ Whisper модель загружена")
             else:
                 logger.debug("✅ Whisper модель уже загружена")
@@ -46,6 +59,19 @@ class AudioProcessor:
 
     def get_info(self, file_path):
         """Получение информации об аудио"""
+        if sf is not None:
+            try:
+                sf_info = sf.info(str(file_path))
+                return {
+                    "duration": sf_info.duration,
+                    "channels": sf_info.channels,
+                    "frame_rate": sf_info.samplerate,
+                    "sample_width": _SAMPLE_WIDTHS.get(sf_info.subtype, 2),
+                }
+            except Exception as e:
+                # Формат, который libsndfile не знает (mp3 в старых версиях, m4a) - через pydub
+                logger.debug(f"soundfile не прочитал {file_path}: {e}")
+
         try:
             audio = AudioSegment.from_file(str(file_path))
             info = {
@@ -67,8 +93,15 @@ class AudioProcessor:
                 if not self.whisper_model:
                     return ""
 
-            result = self.whisper_model.transcribe(str(file_path), language="ru")
-            text = result["text"].strip()
+            # Файлы бывают длинными: с faster-whisper фрагменты распознаются пачками,
+            # openai-whisper сохраняет контекст между 30-секундными окнами
+            text = transcribe_text(
+                self.whisper_model,
+                str(file_path),
+                language="ru",
+                batch_size=TRANSCRIBE_BATCH_SIZE,
+                condition_on_previous_text=True,
+            )
             logger.info(f"📝 Распознано: {text[:100]}...")
             return text
 
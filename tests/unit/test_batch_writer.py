@@ -0,0 +1,63 @@
+import threading
+
+from src.memory.batch_writer import BatchWriter
+
+
+class RecordingWrite:
+    """Функция записи, запоминающая каждую пачку"""
+
+    def __init__(self):
+        self.batches = []
+        self.written = threading.Event()
+
+    def __call__(self, texts, metadatas):
+        self.batches.append((texts, metadatas))
+        self.written.set()
+
+
+def test_flush_at_batch_size():
+    write = RecordingWrite()
+    writer = BatchWriter(write, batch_size=3, flush_interval=60)
+
+    writer.add("a", {"n": 1})
+    writer.add("b", {"n": 2})
+    assert write.batches == []
+    assert len(writer) == 2
+
+    writer.add("c", {"n": 3})
+    assert write.batches == [(["a", "b", "c"], [{"n": 1}, {"n": 2}, {"n": 3}])]
+    assert len(writer) == 0
+    # Полная пачка записана сразу - таймер не остаётся висеть
+    assert writer._timer is None
+
+
+def test_flush_by_timer():
+    write = RecordingWrite()
+    writer = BatchWriter(write, batch_size=32, flush_interval=0.05)
+
+    writer.add("a", {})
+    assert write.written.wait(timeout=2)
+    assert write.batches == [(["a"], [{}])]
+    assert len(writer) == 0
+
+
+def test_flush_empty_is_noop():
+    write = RecordingWrite()
+    writer = BatchWriter(write, batch_size=3, flush_interval=60)
+
+    writer.flush()
+    assert write.batches == []
+
+    writer.add("a", {})
+    writer.flush()
+    writer.flush()
+    assert write.batches == [(["a"], [{}])]
+
+
+def test_write_error_does_not_raise():
+    def failing_write(texts, metadatas):
+        raise RuntimeError("диск недоступен")
+
+    writer = BatchWriter(failing_write, batch_size=1, flush_interval=60)
+    writer.add("a", {})
+    assert len(writer) == 0
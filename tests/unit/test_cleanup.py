@@ -0,0 +1,59 @@
+import os
+import time
+
+import pytest
+
+from src.learning.cleanup import CleanupManager
+
+HOUR = 3600
+
+
+@pytest.fixture
+def manager(tmp_path):
+    config = {"paths": {"data": str(tmp_path / "data"), "logs": str(tmp_path / "logs")}}
+    return CleanupManager(config)
+
+
+def make_file(path, size, age):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_stale_files_by_age(manager, tmp_path):
+    old = make_file(tmp_path / "old.tmp", 10, 2 * HOUR)
+    make_file(tmp_path / "new.tmp", 10, 0)
+    (tmp_path / "old_dir").mkdir()
+    os.utime(tmp_path / "old_dir", (time.time() - 2 * HOUR,) * 2)
+
+    stale = manager._stale_files(tmp_path, HOUR)
+
+    assert [(path, size) for path, size, _ in stale] == [(str(old), 10)]
+    assert stale[0][2] > HOUR
+
+
+def test_stale_files_by_name(manager, tmp_path):
+    log = make_file(tmp_path / "app.log.1.zip", 5, 2 * HOUR)
+    make_file(tmp_path / "notes.txt", 5, 2 * HOUR)
+
+    stale = manager._stale_files(tmp_path, HOUR, ".log")
+
+    assert [path for path, _, _ in stale] == [str(log)]
+
+
+def test_remove_files(manager, tmp_path):
+    files = [make_file(tmp_path / f"{i}.tmp", 100 + i, 2 * HOUR) for i in range(3)]
+
+    removed, freed = manager._remove_files(manager._stale_files(tmp_path, HOUR), "временный файл")
+
+    assert (removed, freed) == (3, 100 + 101 + 102)
+    assert not any(path.exists() for path in files)
+
+
+def test_remove_files_skips_missing(manager, tmp_path):
+    present = make_file(tmp_path / "present.tmp", 7, 2 * HOUR)
+    stale = [(str(present), 7, 2 * HOUR), (str(tmp_path / "gone.tmp"), 50, 2 * HOUR)]
+
+    assert manager._remove_files(stale, "временный файл") == (1, 7)
+    assert manager._remove_files([], "временный файл") == (0, 0)
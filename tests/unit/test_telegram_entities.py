@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("telegram")
+
+from telegram import MessageEntity  # noqa: E402
+
+from src.interfaces.telegram.bot import _bold_entities  # noqa: E402
+
+
+def test_plain_text_without_entities():
+    assert _bold_entities("Просто текст") == ("Просто текст", ())
+
+
+def test_bold_offsets_in_utf16():
+    # Эмодзи вне BMP занимает две единицы UTF-16, кириллица - одну
+    text, entities = _bold_entities("📚 **Команды:**\nи **ещё**")
+
+    assert text == "📚 Команды:\nи ещё"
+    assert [(e.type, e.offset, e.length) for e in entities] == [
+        (MessageEntity.BOLD, 3, 8),
+        (MessageEntity.BOLD, 14, 3),
+    ]
+
+
+def test_bold_length_counts_surrogate_pairs():
+    text, entities = _bold_entities("**🎤 Голос**")
+
+    assert text == "🎤 Голос"
+    assert (entities[0].offset, entities[0].length) == (0, 8)
+
+
+def test_empty_bold_is_skipped():
+    text, entities = _bold_entities("a****b")
+
+    assert text == "ab"
+    assert entities == ()
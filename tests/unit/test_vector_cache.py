@@ -0,0 +1,195 @@
+import hashlib
+import importlib
+import sys
+import types
+
+import numpy as np
+import pytest
+
+DIM = 8
+
+
+class FakeEncoder:
+    """SentenceTransformer без модели: детерминированный единичный вектор на текст"""
+
+    def __init__(self, *args, **kwargs):
+        self.vectors = {}
+        self.max_seq_length = None
+
+    def _vector(self, text):
+        if text in self.vectors:
+            vec = np.asarray(self.vectors[text], dtype=np.float32)
+        else:
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            vec = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+        return vec / np.linalg.norm(vec)
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts])
+
+
+class FakeCollection:
+    """Коллекция ChromaDB в памяти, считающая запросы"""
+
+    def __init__(self):
+        self.docs = []
+        self.queries = 0
+
+    def add(self, documents, embeddings, metadatas, ids):
+        self.docs.extend(zip(documents, metadatas, ids))
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.queries += 1
+        docs = self.docs[:n_results]
+        return {
+            "documents": [[doc for doc, _, _ in docs] for _ in query_embeddings],
+            "distances": [[0.1] * len(docs) for _ in query_embeddings],
+            "metadatas": [[dict(meta) for _, meta, _ in docs] for _ in query_embeddings],
+            "ids": [[doc_id for _, _, doc_id in docs] for _ in query_embeddings],
+        }
+
+    def count(self):
+        return len(self.docs)
+
+
+class FakeClient:
+    def __init__(self, *args, **kwargs):
+        self.collection = FakeCollection()
+
+    def get_or_create_collection(self, name, metadata=None):
+        return self.collection
+
+
+@pytest.fixture
+def vector_memory_cls(monkeypatch):
+    """VectorMemory с заглушками chromadb, sentence-transformers и torch вместо настоящих библиотек"""
+    chromadb = types.ModuleType("chromadb")
+    chromadb.PersistentClient = FakeClient
+    chromadb_config = types.ModuleType("chromadb.config")
+    chromadb_config.Settings = dict
+    sentence_transformers = types.ModuleType("sentence_transformers")
+    sentence_transformers.SentenceTransformer = FakeEncoder
+    torch = types.ModuleType("torch")
+
+    monkeypatch.setitem(sys.modules, "chromadb", chromadb)
+    monkeypatch.setitem(sys.modules, "chromadb.config", chromadb_config)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", sentence_transformers)
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    monkeypatch.delitem(sys.modules, "src.memory.vector_memory", raising=False)
+
+    module = importlib.import_module("src.memory.vector_memory")
+    yield module.VectorMemory
+    sys.modules.pop("src.memory.vector_memory", None)
+
+
+@pytest.fixture
+def make_memory(vector_memory_cls, tmp_path):
+    def make(**memory_config):
+        config = {"memory": {"persist_directory": str(tmp_path), "collection_name": "test", **memory_config}}
+        memory = vector_memory_cls(config)
+        memory.add("Привет, мир!", {"type": "greeting"})
+        return memory
+
+    return make
+
+
+def test_exact_cache_hit(make_memory):
+    memory = make_memory()
+
+    first = memory.search("Как дела?")
+    second = memory.search("  как ДЕЛА?  ")
+
+    assert second == first
+    assert memory.collection.queries == 1
+    assert memory.cache_hits == 1
+    assert memory.cache_misses == 1
+
+
+def test_exact_cache_respects_search_params(make_memory):
+    memory = make_memory()
+
+    memory.search("Как дела?", n_results=5)
+    memory.search("Как дела?", n_results=1)
+    memory.search("Как дела?", where={"type": "greeting"})
+
+    assert memory.collection.queries == 3
+
+
+def test_exact_cache_eviction(make_memory):
+    memory = make_memory(exact_cache_size=2, semantic_cache_size=0)
+
+    memory.search("a")
+    memory.search("b")
+    memory.search("a")  # a - самый свежий, вытесняется b
+    memory.search("c")
+    assert memory.collection.queries == 3
+
+    memory.search("a")
+    assert memory.collection.queries == 3
+    memory.search("b")
+    assert memory.collection.queries == 4
+
+
+def test_semantic_cache_hit(make_memory):
+    memory = make_memory(exact_cache_size=0)
+    memory.encoder.vectors["Как дела?"] = [1.0, 0, 0, 0, 0, 0, 0, 0]
+    memory.encoder.vectors["Как твои дела?"] = [1.0, 0.1, 0, 0, 0, 0, 0, 0]
+    memory.encoder.vectors["Который час?"] = [0, 1.0, 0, 0, 0, 0, 0, 0]
+
+    first = memory.search("Как дела?")
+    assert memory.search("Как твои дела?") == first
+    assert memory.collection.queries == 1
+
+    memory.search("Который час?")
+    assert memory.collection.queries == 2
+
+
+def test_semantic_cache_eviction(make_memory):
+    memory = make_memory(exact_cache_size=0, semantic_cache_size=1)
+
+    memory.search("a")
+    memory.search("a")
+    assert memory.collection.queries == 1
+
+    memory.search("b")
+    memory.search("a")
+    assert memory.collection.queries == 3
+
+
+def test_write_invalidates_cache(make_memory):
+    memory = make_memory()
+
+    assert len(memory.search("Как дела?")) == 1
+    memory.add("Всё хорошо")
+    assert len(memory.search("Как дела?")) == 2
+    assert memory.collection.queries == 2
+
+
+def test_queued_write_invalidates_cache(make_memory):
+    memory = make_memory()
+    writer = memory.batch_writer(batch_size=32, flush_interval=60)
+
+    memory.search("Как дела?")
+    writer.add("Всё хорошо", {})
+
+    # Поиск дописывает очередь, запись сбрасывает кэш
+    assert len(memory.search("Как дела?")) == 2
+    assert memory.collection.queries == 2
+
+
+def test_cache_hit_returns_copy(make_memory):
+    memory = make_memory()
+
+    first = memory.search("Как дела?")
+    first[0]["text"] = "изменено"
+    first[0]["metadata"]["type"] = "изменено"
+
+    second = memory.search("Как дела?")
+    assert second[0]["text"] == "Привет, мир!"
+    assert second[0]["metadata"]["type"] == "greeting"
+    assert memory.collection.queries == 1
+
+    second[0]["metadata"]["type"] = "изменено"
+    assert memory.search("Как дела?")[0]["metadata"]["type"] == "greeting"